@@ -0,0 +1,120 @@
+import os
+import csv
+import sys
+import sqlite3
+from langchain_core.documents import Document
+
+# Shared by the MedQuAD apps in task_3, task_5 and task_6, which add the
+# repo root to sys.path
+
+# "question": embed only the question, keep answers in a SQLite side-store
+# "full":     embed the whole prompt/response row (previous behaviour)
+INDEX_MODE = os.getenv("INDEX_MODE", "question").lower()
+
+ANSWER_STORE_NAME = "answers.sqlite"
+
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+def index_content_columns():
+    """CSV columns embedded into the FAISS index for the current INDEX_MODE"""
+    return ["prompt"] if INDEX_MODE == "question" else ["prompt", "response"]
+
+def answer_store_path(vectordb_file_path: str) -> str:
+    return os.path.join(vectordb_file_path, ANSWER_STORE_NAME)
+
+def mark_question_documents(documents):
+    """Flag documents whose answer lives in the side-store"""
+    if INDEX_MODE == "question":
+        for doc in documents:
+            doc.metadata["answer_in_store"] = True
+    return documents
+
+def build_answer_store(dataset_path: str, vectordb_file_path: str, batch_size: int = 1000):
+    """
+    Stream the CSV into a SQLite table keyed by row number.
+    Row numbers match the "row" metadata set by CSVLoader. The question is
+    stored with its answer, so lookups by question text stay consistent
+    with this store even after the CSV changes.
+    """
+    if INDEX_MODE != "question":
+        return
+
+    path = answer_store_path(vectordb_file_path)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    os.makedirs(vectordb_file_path, exist_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("CREATE TABLE answers (row INTEGER PRIMARY KEY, question TEXT NOT NULL, response TEXT NOT NULL)")
+
+    with open(dataset_path, "r", newline="", encoding="latin-1") as f:
+        batch = []
+        for i, row in enumerate(csv.DictReader(f)):
+            batch.append((i, row.get("prompt") or "", row.get("response") or ""))
+            if len(batch) >= batch_size:
+                conn.executemany("INSERT INTO answers VALUES (?, ?, ?)", batch)
+                batch = []
+        if batch:
+            conn.executemany("INSERT INTO answers VALUES (?, ?, ?)", batch)
+
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, path)
+
+    print("Answer store created at:", path)
+
+def fetch_answers(vectordb_file_path: str, rows):
+    path = answer_store_path(vectordb_file_path)
+    if not rows or not os.path.exists(path):
+        return {}
+
+    conn = sqlite3.connect(path)
+    try:
+        placeholders = ",".join("?" * len(rows))
+        cursor = conn.execute(
+            f"SELECT row, response FROM answers WHERE row IN ({placeholders})",
+            list(rows)
+        )
+        return dict(cursor.fetchall())
+    finally:
+        conn.close()
+
+def fetch_questions(vectordb_file_path: str):
+    """
+    [(row, question), ...] for every stored answer. None when there is no
+    store, or it was built before questions were stored.
+    """
+    path = answer_store_path(vectordb_file_path)
+    if not os.path.exists(path):
+        return None
+
+    conn = sqlite3.connect(path)
+    try:
+        columns = {info[1] for info in conn.execute("PRAGMA table_info(answers)")}
+        if "question" not in columns:
+            return None
+        return conn.execute("SELECT row, question FROM answers").fetchall()
+    finally:
+        conn.close()
+
+def attach_answers(documents, vectordb_file_path: str):
+    """
+    Load answer text for the retrieved (top-k) question documents only.
+    Documents come back in the same "prompt: ...\\nresponse: ..." form a
+    full-row index would produce.
+    """
+    rows = [d.metadata["row"] for d in documents if d.metadata.get("answer_in_store")]
+    answers = fetch_answers(vectordb_file_path, rows)
+
+    hydrated = []
+    for doc in documents:
+        answer = answers.get(doc.metadata.get("row")) if doc.metadata.get("answer_in_store") else None
+        if answer is None:
+            hydrated.append(doc)
+        else:
+            hydrated.append(Document(
+                page_content=f"{doc.page_content}\nresponse: {answer}",
+                metadata=doc.metadata
+            ))
+    return hydrated
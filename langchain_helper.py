@@ -10,6 +10,8 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableMap, RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
+from functools import lru_cache
+from faq_fast_path import FAQFastPath
 
 load_dotenv()  # take environment variables from .env (especially openai api key)
 
@@ -40,9 +42,12 @@ instructor_embeddings = HuggingFaceInstructEmbeddings(
 
 vectordb_file_path = "vector_db_store"
 
+dataset_path = "/Users/vasilansari/Desktop/Gen AI Project/customer-chatbot/dataset/dataset.csv" 
+
+# Question-only index used by the FAQ fast path
+FAQ_INDEX_NAME = "faq"
+
 def create_vector_db():
-    dataset_path = "/Users/vasilansari/Desktop/Gen AI Project/customer-chatbot/dataset/dataset.csv" 
-    
     # Load data from FAQ sheet
     # Load CSV
     loader = CSVLoader(
@@ -61,6 +66,18 @@ def create_vector_db():
 
     print("Vector database created and saved at:", vectordb_file_path)
 
+    # Embed the FAQ questions alone for near-exact matching
+    faq_loader = CSVLoader(
+        file_path=dataset_path,
+        source_column="prompt",
+        content_columns=["prompt"],
+        encoding="latin-1"
+    )
+    faq_db = FAISS.from_documents(documents=faq_loader.load(), embedding=instructor_embeddings)
+    faq_db.save_local(vectordb_file_path, index_name=FAQ_INDEX_NAME)
+
+    get_faq_fast_path.cache_clear()
+
 
 def build_rag_chain(llm, retriever):
 
@@ -104,4 +121,43 @@ def get_qa_chain():
     rag = build_rag_chain(llm, retriever)
 
 
-    return rag
\ No newline at end of file
+    return rag
+
+
+@lru_cache(maxsize=1)
+def get_faq_fast_path():
+    """
+    FAQ fast path over the dataset and its question index, or None when
+    either is missing (questions then always go through RAG).
+    """
+    faq_index = os.path.join(vectordb_file_path, FAQ_INDEX_NAME + ".faiss")
+    if not os.path.exists(dataset_path) or not os.path.exists(faq_index):
+        print("FAQ fast path disabled: dataset or FAQ index not found")
+        return None
+
+    faq_db = FAISS.load_local(
+        vectordb_file_path,
+        instructor_embeddings,
+        index_name=FAQ_INDEX_NAME,
+        allow_dangerous_deserialization=True
+    )
+    return FAQFastPath.from_csv(dataset_path, vectordb=faq_db)
+
+
+def stream_answer(question: str):
+    """
+    Serve near-exact FAQ matches directly; everything else goes through RAG.
+    The answer is an iterator of text chunks (RAG answers stream token by token).
+    """
+    faq = get_faq_fast_path()
+    faq_hit = faq.lookup(question) if faq is not None else None
+    if faq_hit:
+        return {"stream": iter([faq_hit["answer"]]), "from_faq": True}
+
+    rag = get_qa_chain()
+    return {"stream": rag.stream(question), "from_faq": False}
+
+
+def answer_question(question: str):
+    response = stream_answer(question)
+    return {"answer": "".join(response["stream"]), "from_faq": response["from_faq"]}
@@ -1,5 +1,6 @@
+import time
 import streamlit as st
-from langchain_helper import get_qa_chain, create_vector_db
+from langchain_helper import stream_answer, create_vector_db, get_faq_fast_path
 
 st.title(" CUSTOMER SERVICE CHATBOT 🤖")
 btn = st.button("Create Knowledgebase")
@@ -9,8 +10,25 @@ if btn:
 question = st.text_input("Question: ")
 
 if question:
-    rag = get_qa_chain()
-    response = rag.invoke(question)
-
     st.header("Answer")
-    st.write(response)
\ No newline at end of file
+    answer_placeholder = st.empty()
+    answer_text = ""
+    first_token_s = None
+
+    start = time.perf_counter()
+    response = stream_answer(question)
+    for chunk in response["stream"]:
+        if first_token_s is None:
+            first_token_s = time.perf_counter() - start
+        answer_text += chunk
+        answer_placeholder.write(answer_text)
+
+    print(f"Time to first token: {first_token_s or 0:.2f}s")
+
+    if response["from_faq"]:
+        st.caption("⚡ Answered from the FAQ")
+
+    faq = get_faq_fast_path()
+    col1, col2 = st.columns(2)
+    col1.metric("Time to first token", f"{first_token_s or 0:.2f}s")
+    col2.metric("FAQ hit rate", f"{faq.hit_rate():.0%}" if faq is not None else "off")
\ No newline at end of file
@@ -0,0 +1,167 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import Future
+from PIL import Image
+
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "image_cache")
+IMAGE_CACHE_MAX_MB = float(os.getenv("IMAGE_CACHE_MAX_MB", "200"))
+IMAGE_CACHE_FORMAT = os.getenv("IMAGE_CACHE_FORMAT", "WEBP").upper()  # WEBP or PNG
+
+_EXTENSIONS = {"WEBP": ".webp", "PNG": ".png"}
+
+# Result handed to joiners when the owner of a generation was cancelled
+_OWNER_CANCELLED = object()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase and collapse whitespace so trivially different prompts share a key"""
+    return " ".join(prompt.lower().split())
+
+
+def cache_key(prompt: str, config: dict) -> str:
+    payload = json.dumps(
+        {"prompt": normalize_prompt(prompt), "config": config},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    """
+    Content-addressed cache of generated images on disk.
+
+    - Files are named by the hash of (normalized prompt, generation config)
+    - File mtime is used as the LRU clock; the oldest files are evicted
+      once the directory grows past max_bytes
+    - Concurrent requests for the same key share one in-flight generation
+    """
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, max_mb=IMAGE_CACHE_MAX_MB, image_format=IMAGE_CACHE_FORMAT):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.image_format = image_format if image_format in _EXTENSIONS else "PNG"
+        self.extension = _EXTENSIONS[self.image_format]
+
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            image = Image.open(path)
+            image.load()
+        except Exception as e:
+            print(f"Dropping unreadable cached image {path}: {e}")
+            os.remove(path)
+            return None
+
+        # Touch the file so it counts as recently used
+        os.utime(path, None)
+        return image.convert("RGB")
+
+    def put(self, key, image):
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+
+        if self.image_format == "WEBP":
+            image.save(tmp_path, "WEBP", quality=90, method=6)
+        else:
+            image.save(tmp_path, "PNG", optimize=True)
+
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.extension):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        # Oldest first
+        for _mtime, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def get_or_generate(self, prompt, config, generate_fn, cancel_event=None):
+        """
+        Return the cached image for (prompt, config), or call generate_fn() once
+        and cache its result. Callers racing on the same key wait for the
+        generation already in flight instead of starting their own.
+
+        cancel_event belongs to this caller only: if it cancels the generation
+        it owns, a waiting caller takes over instead of receiving None.
+        """
+        key = cache_key(prompt, config)
+
+        image = self.get(key)
+        if image is not None:
+            print(f"Image cache hit: {key[:12]}")
+            return image
+
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                owner = future is None
+                if owner:
+                    # The previous owner may have written the file and left
+                    # _inflight since the check above
+                    image = self.get(key)
+                    if image is not None:
+                        print(f"Image cache hit: {key[:12]}")
+                        return image
+                    future = Future()
+                    self._inflight[key] = future
+
+            if owner:
+                break
+
+            print(f"Image cache: joining in-flight generation {key[:12]}")
+            image = future.result()
+            if image is not _OWNER_CANCELLED:
+                return image
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+
+        # Leave _inflight before resolving the future, so a joiner that takes
+        # over after a cancellation starts a fresh generation
+        try:
+            image = generate_fn()
+            if image is not None:
+                self.put(key, image)
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        cancelled = image is None and cancel_event is not None and cancel_event.is_set()
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_result(_OWNER_CANCELLED if cancelled else image)
+        return image
@@ -2,12 +2,38 @@ from google import genai
 from google.genai import types
 import os
 import io
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
 from PIL import Image
 import google.auth
+from image_cache import ImageCache
 
+# Seconds the UI waits for a background image before giving up on it
+IMAGE_TIMEOUT = float(os.getenv("IMAGE_TIMEOUT", "60"))
+
+# Generation settings; also part of the image cache key
+IMAGE_CONFIG = {
+    "model": "gemini-2.5-flash-image",
+    "image_size": "1K",
+    "aspect_ratio": "1:1",
+    "output_mime_type": "image/png",
+}
+
+image_cache = ImageCache()
+
+# Background workers for image generation (text answers never wait on these)
+_image_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-gen")
+
+
+@lru_cache(maxsize=1)
 def build_vertex_client():
+    """
+    Create the Vertex AI client once per process.
+    google.auth.default() is slow, so the client is reused across requests.
+    """
     credentials, project_id = google.auth.default()
-    
+
     return genai.Client(
         vertexai=True,
         credentials=credentials,
@@ -15,10 +41,10 @@ def build_vertex_client():
         location="us-central1"
     )
 
-def generate(query):
+def generate(query, cancel_event=None):
     client = build_vertex_client()
 
-    model = "gemini-2.5-flash-image"
+    model = IMAGE_CONFIG["model"]
 
     contents = [
         types.Content(
@@ -34,9 +60,9 @@ def generate(query):
     config = types.GenerateContentConfig(
         response_modalities=["IMAGE"],
         image_config=types.ImageConfig(
-            image_size="1K",
-            aspect_ratio="1:1",
-            output_mime_type="image/png",
+            image_size=IMAGE_CONFIG["image_size"],
+            aspect_ratio=IMAGE_CONFIG["aspect_ratio"],
+            output_mime_type=IMAGE_CONFIG["output_mime_type"],
         ),
     )
 
@@ -47,6 +73,11 @@ def generate(query):
         contents=contents,
         config=config,
     ):
+        # Stop pulling the stream once the user has moved on
+        if cancel_event is not None and cancel_event.is_set():
+            print("Image generation cancelled")
+            return None
+
         if not chunk.candidates:
             continue
 
@@ -72,9 +103,61 @@ def generate(query):
         return image
     else:
         return None
-    
+
         # image.save("output.jpg", "JPEG", quality=95)
 
         # print("\n[Image saved as output.png and output.jpg]")
 
-# generate("An illustration showing a MacBook with a Windows virtual machine interface open, displaying the Power BI application.")
\ No newline at end of file
+
+def generate_cached(query, cancel_event=None):
+    """
+    Serve repeated image prompts from the disk cache; identical prompts
+    requested at the same time share a single generation.
+    """
+    return image_cache.get_or_generate(
+        query,
+        IMAGE_CONFIG,
+        lambda: generate(query, cancel_event),
+        cancel_event
+    )
+
+
+class ImageJob:
+    """
+    Handle for an image being generated in the background.
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self.cancel_event = threading.Event()
+        self.future = _image_executor.submit(generate_cached, query, self.cancel_event)
+
+    def result(self, timeout=IMAGE_TIMEOUT):
+        """
+        Wait for the image. Returns None on timeout, cancellation or error.
+        """
+        try:
+            return self.future.result(timeout=timeout)
+        except FutureTimeout:
+            print(f"Image generation timed out after {timeout}s")
+            self.cancel()
+            return None
+        except Exception as e:
+            print(e)
+            return None
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+
+def generate_async(query):
+    """
+    Start image generation in the background and return an ImageJob.
+    """
+    return ImageJob(query)
+
+# generate("An illustration showing a MacBook with a Windows virtual machine interface open, displaying the Power BI application.")
@@ -0,0 +1,95 @@
+import os
+import io
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageOps
+
+# Longest edge (pixels) of images sent to Gemini
+UPLOAD_MAX_EDGE = int(os.getenv("UPLOAD_MAX_EDGE", "1024"))
+UPLOAD_IMAGE_FORMAT = os.getenv("UPLOAD_IMAGE_FORMAT", "WEBP").upper()  # WEBP or JPEG
+UPLOAD_IMAGE_QUALITY = int(os.getenv("UPLOAD_IMAGE_QUALITY", "85"))
+UPLOAD_CACHE_SIZE = 32
+
+_MIME_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class PreparedImage:
+    """
+    An uploaded image after preprocessing, ready to send to Gemini.
+    """
+
+    def __init__(self, digest, data, mime_type, image, original_bytes):
+        self.digest = digest
+        self.data = data
+        self.mime_type = mime_type
+        self.image = image
+        self.original_bytes = original_bytes
+        self.processed_bytes = len(data)
+
+    @property
+    def blob(self):
+        """Inline part accepted by genai.GenerativeModel.generate_content"""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+    def stats(self):
+        return {
+            "original_bytes": self.original_bytes,
+            "processed_bytes": self.processed_bytes,
+            "size": self.image.size,
+        }
+
+
+def _encode(raw: bytes):
+    image = Image.open(io.BytesIO(raw))
+
+    # Apply the EXIF orientation before the metadata is dropped
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGB")
+
+    # Downsize (never upscale) so the longest edge fits UPLOAD_MAX_EDGE
+    image.thumbnail((UPLOAD_MAX_EDGE, UPLOAD_MAX_EDGE), Image.LANCZOS)
+
+    image_format = UPLOAD_IMAGE_FORMAT if UPLOAD_IMAGE_FORMAT in _MIME_TYPES else "JPEG"
+
+    # Re-encoding from pixel data writes no EXIF / metadata
+    buffer = io.BytesIO()
+    if image_format == "WEBP":
+        image.save(buffer, "WEBP", quality=UPLOAD_IMAGE_QUALITY, method=4)
+    else:
+        image.save(buffer, "JPEG", quality=UPLOAD_IMAGE_QUALITY, optimize=True)
+
+    return buffer.getvalue(), _MIME_TYPES[image_format], image
+
+
+def preprocess_upload(raw: bytes) -> PreparedImage:
+    """
+    Downsize, strip metadata and re-encode an uploaded image.
+    Results are cached by content hash, so Streamlit reruns and repeated
+    uploads of the same file are not processed again.
+    """
+    digest = hashlib.sha256(raw).hexdigest()
+
+    with _cache_lock:
+        prepared = _cache.get(digest)
+        if prepared is not None:
+            _cache.move_to_end(digest)
+            return prepared
+
+    data, mime_type, image = _encode(raw)
+    prepared = PreparedImage(digest, data, mime_type, image, len(raw))
+
+    print(
+        f"Preprocessed upload {digest[:12]}: "
+        f"{prepared.original_bytes} -> {prepared.processed_bytes} bytes, size {image.size}"
+    )
+
+    with _cache_lock:
+        _cache[digest] = prepared
+        while len(_cache) > UPLOAD_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return prepared
@@ -0,0 +1,139 @@
+import os
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+
+# CPU image/text model sharing one embedding space
+CLIP_MODEL_NAME = os.getenv("CLIP_MODEL_NAME", "clip-ViT-B-32")
+ENABLE_IMAGE_RETRIEVAL = os.getenv("ENABLE_IMAGE_RETRIEVAL", "true").lower() == "true"
+
+# Weight of the image embedding when fused with the text query (0..1)
+IMAGE_QUERY_WEIGHT = float(os.getenv("IMAGE_QUERY_WEIGHT", "0.5"))
+
+# Minimum cosine between the fused query and a row; CLIP always returns k
+# neighbours, so unrelated images would otherwise pull in unrelated rows
+IMAGE_MIN_SIMILARITY = float(os.getenv("IMAGE_MIN_SIMILARITY", "0.2"))
+
+CLIP_INDEX_NAME = "clip"
+
+# CLIP's text tower has 77 positions (including start/end tokens)
+CLIP_MAX_TOKENS = 77
+
+
+@lru_cache(maxsize=1)
+def load_clip_model():
+    """
+    Load the CLIP model once. Returns None when image retrieval is disabled
+    or the model is unavailable, so callers fall back to text-only retrieval.
+    """
+    if not ENABLE_IMAGE_RETRIEVAL:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(CLIP_MODEL_NAME, device="cpu")
+    except Exception as e:
+        print(f"Image retrieval disabled, could not load {CLIP_MODEL_NAME}: {e}")
+        return None
+
+
+def _normalize(vec):
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+class ClipEmbeddings(Embeddings):
+    """
+    LangChain embeddings backed by CLIP, with an extra image encoder.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def _truncate(self, texts: List[str]) -> List[str]:
+        # sentence-transformers pads CLIP text but does not truncate it, so
+        # longer FAQ rows would fail to encode. Keep the leading tokens; the
+        # question at the start of each row is what matters for matching
+        processor = getattr(self.model[0], "processor", None)
+        if processor is None:
+            return texts
+
+        tokenizer = processor.tokenizer
+        ids = tokenizer(texts, add_special_tokens=False, truncation=True, max_length=CLIP_MAX_TOKENS - 2)["input_ids"]
+        return [tokenizer.decode(i, skip_special_tokens=True) for i in ids]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vecs = self.model.encode(self._truncate(texts), batch_size=32, normalize_embeddings=True)
+        return vecs.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def embed_image(self, image) -> List[float]:
+        vec = self.model.encode([image], normalize_embeddings=True)[0]
+        return vec.tolist()
+
+
+def create_image_index(documents, vectordb_file_path):
+    """
+    Build the CLIP index next to the main index in vectordb_file_path.
+    """
+    model = load_clip_model()
+    if model is None:
+        return
+
+    vectordb = FAISS.from_documents(documents=documents, embedding=ClipEmbeddings(model))
+    vectordb.save_local(vectordb_file_path, index_name=CLIP_INDEX_NAME)
+    load_image_index.cache_clear()
+
+    print("Image retrieval index created and saved at:", vectordb_file_path)
+
+
+@lru_cache(maxsize=1)
+def load_image_index(vectordb_file_path):
+    model = load_clip_model()
+    if model is None:
+        return None
+
+    if not os.path.exists(os.path.join(vectordb_file_path, CLIP_INDEX_NAME + ".faiss")):
+        return None
+
+    return FAISS.load_local(
+        vectordb_file_path,
+        ClipEmbeddings(model),
+        index_name=CLIP_INDEX_NAME,
+        allow_dangerous_deserialization=True
+    )
+
+
+def fused_query_vector(embeddings: ClipEmbeddings, question: str, image):
+    """
+    Weighted sum of the text and image embeddings (both unit length).
+    """
+    image_vec = np.array(embeddings.embed_image(image))
+
+    if not question or not question.strip():
+        return image_vec.tolist()
+
+    text_vec = np.array(embeddings.embed_query(question))
+    fused = (1 - IMAGE_QUERY_WEIGHT) * text_vec + IMAGE_QUERY_WEIGHT * image_vec
+    return _normalize(fused).tolist()
+
+
+def retrieve_with_image(question: str, image, vectordb_file_path, k: int = 4):
+    """
+    Retrieve documents for an uploaded image (optionally with a question).
+    Everything runs locally; returns [] when the CLIP index is not available.
+    Rows below IMAGE_MIN_SIMILARITY are dropped.
+    """
+    vectordb = load_image_index(vectordb_file_path)
+    if vectordb is None:
+        return []
+
+    query_vec = fused_query_vector(vectordb.embedding_function, question, image)
+    hits = vectordb.similarity_search_with_score_by_vector(query_vec, k=k)
+
+    # The index stores squared L2 distances between unit vectors: cos = 1 - d / 2
+    return [doc for doc, distance in hits if 1 - distance / 2 >= IMAGE_MIN_SIMILARITY]
@@ -0,0 +1,123 @@
+import json
+
+
+class StreamingJSONFieldParser:
+    """
+    Incremental parser for a flat JSON object of string fields, e.g.
+    {"image_prompt": "...", "answer": "..."}, arriving in arbitrary chunks.
+
+    feed() returns a list of events:
+    - ("delta", key, text)  decoded text appended to a string field
+    - ("field", key, value) a field is complete (value is the full string)
+
+    Anything outside the object (```json fences, whitespace) is ignored.
+    """
+
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self):
+        self.state = "seek_key"
+        self.key = ""
+        self.value = []
+        self.literal = ""
+        self.escape = None      # pending escape sequence after a backslash
+        self.high_surrogate = None
+        self.fields = {}
+
+    def feed(self, chunk: str):
+        events = []
+        delta = []
+
+        for ch in chunk:
+            if self.state == "seek_key":
+                if ch == '"':
+                    self.state = "key"
+                    self.key = ""
+
+            elif self.state == "key":
+                if ch == '"':
+                    self.state = "colon"
+                else:
+                    self.key += ch
+
+            elif self.state == "colon":
+                if ch == ":":
+                    self.state = "seek_value"
+
+            elif self.state == "seek_value":
+                if ch == '"':
+                    self.state = "string"
+                    self.value = []
+                elif not ch.isspace():
+                    self.state = "literal"
+                    self.literal = ch
+
+            elif self.state == "string":
+                text = self._string_char(ch)
+                if text is None:
+                    # closing quote
+                    if delta:
+                        events.append(("delta", self.key, "".join(delta)))
+                        delta = []
+                    self._finish("".join(self.value))
+                    events.append(("field", self.key, self.fields[self.key]))
+                elif text:
+                    self.value.append(text)
+                    delta.append(text)
+
+            elif self.state == "literal":
+                if ch in ",}":
+                    try:
+                        value = json.loads(self.literal.strip())
+                    except ValueError:
+                        value = self.literal.strip()
+                    self._finish("" if value is None else str(value))
+                    events.append(("field", self.key, self.fields[self.key]))
+                else:
+                    self.literal += ch
+
+        if delta:
+            events.append(("delta", self.key, "".join(delta)))
+
+        return events
+
+    def _finish(self, value):
+        self.fields[self.key] = value
+        self.state = "seek_key"
+
+    def _string_char(self, ch):
+        """
+        Decode one character inside a JSON string.
+        Returns decoded text ("" while an escape is pending) or None at the closing quote.
+        """
+        if self.escape is not None:
+            self.escape += ch
+
+            if self.escape.startswith("u"):
+                if len(self.escape) < 5:
+                    return ""
+                code = int(self.escape[1:], 16)
+                self.escape = None
+                return self._code_point(code)
+
+            self.escape = None
+            return self._ESCAPES.get(ch, ch)
+
+        if ch == "\\":
+            self.escape = ""
+            return ""
+
+        if ch == '"':
+            return None
+
+        return ch
+
+    def _code_point(self, code):
+        # Join UTF-16 surrogate pairs (\\ud83d\\ude00) into one character
+        if 0xD800 <= code <= 0xDBFF:
+            self.high_surrogate = code
+            return ""
+        if 0xDC00 <= code <= 0xDFFF and self.high_surrogate is not None:
+            code = 0x10000 + ((self.high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self.high_surrogate = None
+        return chr(code)
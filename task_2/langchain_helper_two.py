@@ -11,7 +11,9 @@ import google.generativeai as genai
 from PIL import Image
 import os
 import json
-from image_generation import generate
+from image_generation import generate_async
+from image_retrieval import create_image_index, retrieve_with_image
+from json_stream import StreamingJSONFieldParser
 
 load_dotenv()
 
@@ -52,6 +54,13 @@ def create_vector_db():
 
     print("Vector database created and saved at:", vectordb_file_path)
 
+    # Second index in the shared image/text space, used for image queries.
+    # Optional: a CLIP failure must not undo the text index built above
+    try:
+        create_image_index(data, vectordb_file_path)
+    except Exception as e:
+        print("Image retrieval index not created:", e)
+
 
 prompt_template = """
 You are an assistant for ElevanceSkills.
@@ -61,11 +70,11 @@ Given the following context and question, answer ONLY from the context. If answe
 RULES:
 - NEVER invent information.
 - NEVER answer using outside knowledge.
-- If a visual explanation helps, generate an IMAGE_PROMPT.
-- Respond in the following JSON format:
+- If a visual explanation helps, generate an IMAGE_PROMPT, otherwise leave it empty.
+- Respond in the following JSON format, with "image_prompt" first:
 {{
-  "answer": "...",
-  "image_prompt": "..."
+  "image_prompt": "...",
+  "answer": "..."
 }}
 
 CONTEXT:
@@ -87,16 +96,29 @@ rag = (
     | StrOutputParser()
 )
 
-def combined_retrieval(query):
+def combined_retrieval(query, image=None):
     # Load the vector database from the local folder
     vectordb = FAISS.load_local(vectordb_file_path, embeddings, allow_dangerous_deserialization=True)
 
     # Primary retrieval from main vectordb
-    try:
-        retriever = vectordb.as_retriever(score_threshold=0.7)
-        vector_docs = retriever.invoke(query)
-    except Exception:
-        vector_docs = []
+    vector_docs = []
+    if query and query.strip():
+        try:
+            retriever = vectordb.as_retriever(score_threshold=0.7)
+            vector_docs = retriever.invoke(query)
+        except Exception:
+            vector_docs = []
+
+    # Image + question retrieval from the CLIP index (local, no extra API call)
+    if image:
+        try:
+            image_docs = retrieve_with_image(query, image.image, vectordb_file_path)
+        except Exception as e:
+            print(e)
+            image_docs = []
+
+        seen = {d.page_content for d in vector_docs}
+        vector_docs += [d for d in image_docs if d.page_content not in seen]
 
     # Return as text context: join top N documents' content
     texts = [d.page_content for d in vector_docs]
@@ -108,28 +130,23 @@ def get_gemini_response(question: str, image=None):
     Gemini response that considers:
     - RAG context
     - Prompt rules
-    - Optional image
+    - Optional image (a PreparedImage from image_preprocess)
     """
 
-    # 1. Retrieve context from vector DB
-    context = combined_retrieval(question)
+    contents = build_gemini_contents(question, image)
 
-    # 2. Build final prompt using your template
-    final_prompt = PROMPT.format(
-        context=context,
-        question=question
-    )
+    # No context and no image to ground an answer on, so skip the Gemini call
+    if contents is None:
+        return {
+            "text": "I don't know.",
+            "image_job": None
+        }
 
     # 3. Gemini native model
     model = genai.GenerativeModel("gemini-2.5-flash-lite")
 
     # 4. Multimodal call
-    if image:
-        response = model.generate_content(
-            [final_prompt, image]
-        )
-    else:
-        response = model.generate_content(final_prompt)
+    response = model.generate_content(contents)
 
     # print(response)
 
@@ -152,17 +169,90 @@ def get_gemini_response(question: str, image=None):
     answer_text = result["answer"]
 
     try:
-        ## image generation logic
+        ## image generation logic (runs in the background, text is returned right away)
         if(image_prompt.strip() != ""):
-            response_image = generate(image_prompt)
+            image_job = generate_async(image_prompt)
         else:
-            response_image = None
+            image_job = None
     except Exception as e:
         print(e)
-        response_image = None
+        image_job = None
 
     chatbot_response = {
         "text": answer_text,
-        "image": response_image
+        "image_job": image_job
     }
-    return chatbot_response
\ No newline at end of file
+    return chatbot_response
+
+
+def build_gemini_contents(question: str, image=None):
+    """
+    Retrieve context and build the Gemini request contents.
+    Returns None when no context was found and there is no image.
+    """
+
+    # 1. Retrieve context from vector DB (text + uploaded image)
+    context = combined_retrieval(question, image)
+
+    # With an image, Gemini can still answer from the image itself
+    if not context.strip() and not image:
+        return None
+
+    # 2. Build final prompt using your template
+    final_prompt = PROMPT.format(
+        context=context,
+        question=question
+    )
+
+    if image:
+        return [final_prompt, image.blob]
+    return final_prompt
+
+
+def stream_gemini_response(question: str, image=None):
+    """
+    Streaming variant of get_gemini_response.
+
+    Yields ("answer", text_delta) as the answer is generated and
+    ("image_job", ImageJob) as soon as the image_prompt field is complete,
+    while the rest of the answer is still streaming.
+    """
+
+    contents = build_gemini_contents(question, image)
+
+    if contents is None:
+        yield ("answer", "I don't know.")
+        return
+
+    model = genai.GenerativeModel("gemini-2.5-flash-lite")
+    response = model.generate_content(contents, stream=True)
+
+    parser = StreamingJSONFieldParser()
+    raw_chunks = []
+    streamed_answer = False
+
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # chunk without text parts (e.g. safety / finish metadata)
+            continue
+
+        raw_chunks.append(text)
+
+        for event, key, value in parser.feed(text):
+            if event == "delta" and key == "answer":
+                streamed_answer = True
+                yield ("answer", value)
+
+            elif event == "field" and key == "image_prompt" and value.strip():
+                try:
+                    yield ("image_job", generate_async(value))
+                except Exception as e:
+                    print(e)
+
+    print(f"LLM Response: {''.join(raw_chunks)}\n\n")
+
+    # Model ignored the JSON format: show the raw text instead
+    if not streamed_answer:
+        yield ("answer", "".join(raw_chunks).strip())
\ No newline at end of file
@@ -1,7 +1,7 @@
 import streamlit as st
-from PIL import Image
 
-from langchain_helper_two import create_vector_db, get_gemini_response
+from langchain_helper_two import create_vector_db, stream_gemini_response
+from image_preprocess import preprocess_upload
 
 st.set_page_config(page_title="ElevanceSkills Multi Modal Chatbot")
 
@@ -18,16 +18,48 @@ uploaded_file = st.file_uploader("Choose an image...", type=["jpg", "jpeg", "png
 image = ""
 
 if uploaded_file is not None:
-    image = Image.open(uploaded_file)
-    st.image(image, caption="Uploaded Image.", use_column_width=True)
+    image = preprocess_upload(uploaded_file.getvalue())
+    st.image(image.image, caption="Uploaded Image.", use_column_width=True)
+
+    stats = image.stats()
+    st.caption(
+        f"Image size: {stats['original_bytes'] / 1024:.0f} KB → "
+        f"{stats['processed_bytes'] / 1024:.0f} KB ({stats['size'][0]}x{stats['size'][1]})"
+    )
+
+# Cancel a pending image when the user moves on to a different question
+previous_job = st.session_state.get("image_job")
+if previous_job is not None and st.session_state.get("image_job_question") != input:
+    previous_job.cancel()
+    st.session_state.image_job = None
 
 if st.button("Ask"):
+    if previous_job is not None:
+        previous_job.cancel()
+
+    st.subheader("Answer")
+    answer_placeholder = st.empty()
+    answer_text = ""
+    image_job = None
+
     with st.spinner("Answering..."):
-        response = get_gemini_response(input, image)
-        # answer = rag.invoke(query)
+        # Answer tokens render as they arrive; the image starts generating
+        # as soon as its prompt is complete
+        for kind, value in stream_gemini_response(input, image):
+            if kind == "answer":
+                answer_text += value
+                answer_placeholder.write(answer_text)
+            elif kind == "image_job":
+                image_job = value
 
+    if image_job:
+        st.session_state.image_job = image_job
+        st.session_state.image_job_question = input
 
-    st.subheader("Answer")
-    st.write(response["text"])
-    if response["image"]:
-        st.image(response["image"], caption="Generated Explanation")
\ No newline at end of file
+        with st.spinner("Generating explanation image..."):
+            generated_image = image_job.result()
+
+        if generated_image:
+            st.image(generated_image, caption="Generated Explanation")
+        else:
+            st.caption("Explanation image is not available.")
\ No newline at end of file
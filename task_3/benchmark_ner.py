@@ -0,0 +1,68 @@
+import csv
+import sys
+import time
+import json
+import statistics
+
+from ner import run_ner, load_ner_pipeline
+
+DATASET_PATH = "data/medquad.csv"
+BACKENDS = ["torch", "int8", "onnx"]
+
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+def load_answers(limit: int = 200):
+    answers = []
+    with open(DATASET_PATH, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            answers.append(row["response"])
+            if len(answers) >= limit:
+                break
+    return answers
+
+def entity_set(output):
+    return {(item["entity_group"].lower(), item["word"].lower()) for item in output}
+
+def agreement(reference, candidate):
+    """Mean Jaccard similarity of (label, word) entity sets"""
+    scores = []
+    for ref, cand in zip(reference, candidate):
+        ref_set, cand_set = entity_set(ref), entity_set(cand)
+        union = ref_set | cand_set
+        scores.append(len(ref_set & cand_set) / len(union) if union else 1.0)
+    return statistics.mean(scores)
+
+def benchmark(limit: int = 200, batch_size: int = 16):
+    """
+    Compare NER backends on MedQuAD answers: latency per answer and
+    entity agreement with the PyTorch path.
+    """
+    texts = load_answers(limit)
+    print(f"Benchmarking NER on {len(texts)} answers")
+
+    results = {}
+    reference = None
+
+    for backend in BACKENDS:
+        load_ner_pipeline(backend)          # exclude model load / export time
+        run_ner(texts[:2], backend=backend)  # warm-up
+
+        start = time.perf_counter()
+        outputs = run_ner(texts, backend=backend, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            reference = outputs
+
+        results[backend] = {
+            "total_s": round(elapsed, 3),
+            "ms_per_text": round(1000 * elapsed / len(texts), 2),
+            "agreement_vs_torch": round(agreement(reference, outputs), 4),
+        }
+        print(backend, results[backend])
+
+    return results
+
+if __name__ == "__main__":
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(json.dumps(benchmark(limit), indent=2))
@@ -0,0 +1,177 @@
+import os
+import re
+import csv
+import sys
+import json
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+from tqdm import tqdm
+
+from ner import extract_medical_entities_batch
+
+DATASET_PATH = "data/medquad.csv"
+ENTITY_INDEX_PATH = "vector_db_store/entity_index.json"
+
+# Entity categories used for retrieval (others / anatomy are too generic)
+INDEX_CATEGORIES = ["diseases", "symptoms", "drugs", "treatments"]
+
+# Above this many candidates the pre-filter doesn't narrow enough; use plain FAISS
+MAX_PREFILTER_CANDIDATES = 5000
+
+# Score bonus per matched query entity (on top of -L2 distance)
+ENTITY_BOOST = 0.1
+
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+def normalize_entity(entity: str) -> str:
+    entity = entity.lower().replace("##", "")
+    entity = re.sub(r"[^\w\s-]", " ", entity)
+    return " ".join(entity.split())
+
+def entity_terms(entities: dict):
+    terms = set()
+    for category in INDEX_CATEGORIES:
+        for ent in entities.get(category, []):
+            term = normalize_entity(ent)
+            if len(term) > 2:
+                terms.add(term)
+    return terms
+
+def questions_fingerprint(questions) -> str:
+    """Hash of the questions in row order; equal fingerprints mean row numbers line up"""
+    digest = hashlib.sha1()
+    for question in questions:
+        digest.update(question.encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+def build_entity_index(dataset_path: str = DATASET_PATH, batch_size: int = 256):
+    """
+    Offline pass: run NER over every question once and write an inverted
+    index {normalized entity: [csv row, ...]}. Row numbers match the "row"
+    metadata CSVLoader puts on each document; a fingerprint of the questions
+    is stored with the postings so a mismatching FAISS index is detected.
+
+    The MedQuAD focus column (the disease / drug a document is about) is
+    indexed as an entity too.
+    """
+    with open(dataset_path, "r", newline="", encoding="latin-1") as f:
+        rows = list(csv.DictReader(f))
+
+    postings = {}
+
+    for start in tqdm(range(0, len(rows), batch_size)):
+        batch = rows[start:start + batch_size]
+        entities = extract_medical_entities_batch([r["prompt"] for r in batch])
+
+        for offset, (row, ents) in enumerate(zip(batch, entities)):
+            row_id = start + offset
+            terms = entity_terms(ents)
+
+            focus = normalize_entity(row.get("focus") or "")
+            if focus:
+                terms.add(focus)
+
+            for term in terms:
+                postings.setdefault(term, []).append(row_id)
+
+    os.makedirs(os.path.dirname(ENTITY_INDEX_PATH), exist_ok=True)
+    with open(ENTITY_INDEX_PATH, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": questions_fingerprint(r["prompt"] for r in rows), "postings": postings}, f)
+
+    load_entity_index.cache_clear()
+    print(f"Entity index saved at {ENTITY_INDEX_PATH}: {len(postings)} entities over {len(rows)} rows")
+
+@lru_cache(maxsize=1)
+def load_entity_index():
+    """{"fingerprint", "postings"}, or None (missing, or built by an older version)"""
+    if not os.path.exists(ENTITY_INDEX_PATH):
+        return None
+    with open(ENTITY_INDEX_PATH, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    if "fingerprint" not in index:
+        print("Entity index predates row fingerprints, rebuild it with: python entity_index.py")
+        return None
+    return index
+
+def row_positions(vectordb, fingerprint: str = None):
+    """
+    Map csv row -> position in the FAISS index. With a fingerprint, returns
+    None unless the indexed questions (CSVLoader "source") match it row for row.
+    """
+    positions = {}
+    questions = {}
+    for pos, docstore_id in vectordb.index_to_docstore_id.items():
+        doc = vectordb.docstore.search(docstore_id)
+        positions[doc.metadata.get("row")] = pos
+        questions[doc.metadata.get("row")] = doc.metadata.get("source") or ""
+
+    if fingerprint is not None:
+        ordered = (questions[row] for row in sorted(questions))
+        if questions_fingerprint(ordered) != fingerprint:
+            print("Entity index does not match the vector store rows, entity-aware search disabled")
+            return None
+
+    return positions
+
+def match_candidates(question: str, postings: dict):
+    """
+    Return {csv row: number of query entities it matches}.
+    """
+    query_entities = extract_medical_entities_batch([question])[0]
+    terms = entity_terms(query_entities)
+
+    matches = {}
+    for term in terms:
+        for row_id in postings.get(term, []):
+            matches[row_id] = matches.get(row_id, 0) + 1
+    return matches
+
+def entity_aware_search(vectordb, question: str, k: int = 4, positions: dict = None):
+    """
+    Dense search restricted to (and boosted by) documents sharing a medical
+    entity with the question. Falls back to plain FAISS search when the
+    question has no indexed entity or the candidate set is too large.
+    """
+    index = load_entity_index()
+    if index is None:
+        return vectordb.similarity_search(question, k=k)
+    postings = index["postings"]
+
+    matches = match_candidates(question, postings)
+    if not matches or len(matches) > MAX_PREFILTER_CANDIDATES:
+        return vectordb.similarity_search(question, k=k)
+
+    if positions is None:
+        positions = row_positions(vectordb, index["fingerprint"])
+        if positions is None:
+            return vectordb.similarity_search(question, k=k)
+
+    candidates = [(positions[r], n) for r, n in matches.items() if r in positions]
+    if not candidates:
+        return vectordb.similarity_search(question, k=k)
+
+    query_vec = np.array(vectordb.embedding_function.embed_query(question), dtype="float32")
+    doc_vecs = np.vstack([vectordb.index.reconstruct(int(pos)) for pos, _ in candidates])
+
+    distances = np.linalg.norm(doc_vecs - query_vec, axis=1)
+    boosts = np.array([n for _, n in candidates], dtype="float32") * ENTITY_BOOST
+    order = np.argsort(distances - boosts)[:k]
+
+    docs = [
+        vectordb.docstore.search(vectordb.index_to_docstore_id[candidates[i][0]])
+        for i in order
+    ]
+
+    # Top up with dense results when few documents matched an entity
+    if len(docs) < k:
+        seen = {d.page_content for d in docs}
+        for doc in vectordb.similarity_search(question, k=k):
+            if doc.page_content not in seen and len(docs) < k:
+                docs.append(doc)
+
+    return docs
+
+if __name__ == "__main__":
+    build_entity_index()
@@ -1,66 +1,163 @@
 import os
+import sys
 import csv
+import json
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 
 MEDQUAD_ROOT = "MedQuAD"
 OUTPUT_CSV = "data/medquad.csv"
+MANIFEST_PATH = "data/medquad_manifest.json"
+
+FIELDNAMES = [
+    'prompt', 'response',
+    'document_id', 'question_id', 'source', 'focus', 'qtype', 'source_file'
+]
+
+# MedQuAD answers can exceed the default csv field limit
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
 
 def clean_text(text: str) -> str:
     """Normalize whitespace and newlines"""
     return " ".join(text.split()).strip()
 
-def parse_medquad_to_csv():
+def parse_medquad_file(file_path: str):
+    """
+    Stream one MedQuAD XML file with iterparse.
+    Returns (file_path, rows, error).
+    """
     rows = []
-
-    for root, _, files in os.walk(MEDQUAD_ROOT):
-        for file in files:
-            if not file.endswith(".xml"):
+    doc_meta = {}
+    focus = ""
+
+    try:
+        for event, el in ET.iterparse(file_path, events=("start", "end")):
+            if event == "start":
+                if el.tag == "Document":
+                    doc_meta = dict(el.attrib)
                 continue
 
-            file_path = os.path.join(root, file)
+            if el.tag == "Focus":
+                focus = clean_text(el.text or "")
 
-            try:
-                tree = ET.parse(file_path)
-                doc = tree.getroot()
+            elif el.tag == "QAPair":
+                q_el = el.find("Question")
+                a_el = el.find("Answer")
 
-                qa_pairs = doc.find("QAPairs")
-                if qa_pairs is None:
-                    continue
+                if q_el is not None and a_el is not None:
+                    question = clean_text(q_el.text or "")
+                    answer = clean_text(" ".join(a_el.itertext()))
+
+                    if question and answer:
+                        rows.append({
+                            'prompt': question,
+                            'response': answer,
+                            'document_id': doc_meta.get("id", ""),
+                            'question_id': q_el.get("qid", ""),
+                            'source': doc_meta.get("source", ""),
+                            'focus': focus,
+                            'qtype': q_el.get("qtype", ""),
+                            'source_file': file_path,
+                        })
+
+                # Free the parsed subtree, answers can be large
+                el.clear()
+
+    except Exception as e:
+        return file_path, [], str(e)
+
+    return file_path, rows, None
+
+def list_xml_files(root_dir: str):
+    xml_files = []
+    for root, _, files in os.walk(root_dir):
+        for file in files:
+            if file.endswith(".xml"):
+                xml_files.append(os.path.join(root, file))
+    return sorted(xml_files)
+
+def file_signature(file_path: str):
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH) or not os.path.exists(OUTPUT_CSV):
+        return {}
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_manifest(manifest: dict):
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+def parse_medquad_to_csv(workers: int = None, full_rebuild: bool = False):
+    """
+    Convert MedQuAD XML into OUTPUT_CSV.
+
+    - Files are parsed in parallel across a process pool
+    - Rows are written in list_xml_files order, so rows of unchanged files
+      keep their positions as long as earlier files keep their row counts
+    - A (size, mtime) manifest lets re-runs reuse rows of unchanged files
+    """
+    xml_files = list_xml_files(MEDQUAD_ROOT)
+    current = {path: file_signature(path) for path in xml_files}
+
+    previous = {} if full_rebuild else load_manifest()
+    unchanged = {path for path, sig in current.items() if previous.get(path) == sig}
+    to_parse = [path for path in xml_files if path not in unchanged]
+
+    print(f"📄 {len(xml_files)} XML files: {len(unchanged)} unchanged, {len(to_parse)} to parse")
+
+    # ---- Rows of unchanged files, grouped by file ----
+    carried = {}
+    if unchanged:
+        with open(OUTPUT_CSV, "r", newline="", encoding="utf-8") as old:
+            for row in csv.DictReader(old):
+                if row.get('source_file') in unchanged:
+                    carried.setdefault(row['source_file'], []).append({k: row.get(k, "") for k in FIELDNAMES})
 
-                for qa in qa_pairs.findall("QAPair"):
-                    q_el = qa.find("Question")
-                    a_el = qa.find("Answer")
+    os.makedirs("data", exist_ok=True)
+    tmp_csv = OUTPUT_CSV + ".tmp"
+    total_rows = 0
+    failed = set()
 
-                    if q_el is None or a_el is None:
-                        continue
+    with open(tmp_csv, "w", newline="", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = csv.DictWriter(out, fieldnames=FIELDNAMES, quoting=csv.QUOTE_ALL)
+        writer.writeheader()
 
-                    question = clean_text(q_el.text or "")
-                    answer = clean_text(" ".join(a_el.itertext()))
+        # Changed / new files are parsed in parallel; pool.map yields them
+        # in to_parse order, which follows xml_files order
+        parsed = iter(pool.map(parse_medquad_file, to_parse, chunksize=32)) if to_parse else iter(())
+        progress = tqdm(total=len(to_parse))
+
+        # ---- Merge carried-over and parsed rows in file order ----
+        for path in xml_files:
+            if path in unchanged:
+                rows = carried.pop(path, [])
+            else:
+                file_path, rows, error = next(parsed)
+                progress.update(1)
+                if error:
+                    print(f"❌ Error parsing {file_path}: {error}")
+                    failed.add(file_path)
+                    continue
 
-                    if not question or not answer:
-                        continue
+            writer.writerows(rows)
+            total_rows += len(rows)
 
-                    rows.append({
-                        'prompt': question,
-                        'response': answer
-                    })
+        progress.close()
 
-            except Exception as e:
-                print(f"❌ Error parsing {file_path}: {e}")
+    os.replace(tmp_csv, OUTPUT_CSV)
 
-    # ---- Write CSV ----
-    os.makedirs("data", exist_ok=True)
-    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=['prompt', 'response'],
-            quoting=csv.QUOTE_ALL
-        )
-        writer.writeheader()
-        writer.writerows(rows)
+    # Failed files are left out of the manifest so the next run retries them
+    save_manifest({path: sig for path, sig in current.items() if path not in failed})
 
-    print(f"✅ Saved {len(rows)} Q&A pairs to {OUTPUT_CSV}")
+    print(f"✅ Saved {total_rows} Q&A pairs to {OUTPUT_CSV}")
 
 if __name__ == "__main__":
-    parse_medquad_to_csv()
+    parse_medquad_to_csv(full_rebuild="--full" in sys.argv)
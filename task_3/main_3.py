@@ -1,5 +1,6 @@
+import time
 import streamlit as st
-from retriever import answer_with_entities, create_vector_store
+from retriever import stream_answer, detect_entities, create_vector_store, get_faq_fast_path
 
 st.set_page_config(page_title="Medical Q&A Chatbot")
 
@@ -16,12 +17,32 @@ if btn:
 question = st.text_input("Ask a question:")
 
 if st.button("Ask") and question:
+    st.subheader("Answer")
+    answer_placeholder = st.empty()
+    answer_text = ""
+    first_token_s = None
+
     with st.spinner("Searching medical knowledge..."):
-        response = answer_with_entities(question)
+        start = time.perf_counter()
+        response = stream_answer(question)
+        for chunk in response["stream"]:
+            if first_token_s is None:
+                first_token_s = time.perf_counter() - start
+            answer_text += chunk
+            answer_placeholder.write(answer_text)
         # response = rag.invoke(question)
 
-    st.subheader("Answer")
-    st.write(response["answer"])
+    print(f"Time to first token: {first_token_s or 0:.2f}s")
+
+    if response["from_faq"]:
+        st.caption("⚡ Answered from the MedQuAD FAQ")
+
+    col1, col2 = st.columns(2)
+    col1.metric("Time to first token", f"{first_token_s or 0:.2f}s")
+    col2.metric("FAQ hit rate", f"{get_faq_fast_path().hit_rate():.0%}")
+
+    with st.spinner("Detecting medical entities..."):
+        response.update(detect_entities(question, answer_text))
 
     #NER
     st.markdown("---")
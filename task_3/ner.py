@@ -1,29 +1,144 @@
 from transformers import AutoTokenizer, AutoModelForTokenClassification
 from transformers import pipeline
 from functools import lru_cache
+from collections import OrderedDict
+import hashlib
+import os
+import threading
 
-@lru_cache(maxsize=1)
-def load_ner_pipeline():
+NER_MODEL_NAME = "d4data/biomedical-ner-all"
+
+# "torch" (default), "int8" (dynamic int8 quantization) or "onnx" (ONNX Runtime via optimum)
+NER_BACKEND = os.getenv("NER_BACKEND", "torch").lower()
+
+NER_BATCH_SIZE = 16
+NER_CACHE_SIZE = 2048
+
+# Long texts are split into overlapping token windows
+NER_WINDOW_TOKENS = 256
+NER_WINDOW_OVERLAP = 64
+
+_entity_cache = OrderedDict()
+_entity_cache_lock = threading.Lock()
+
+@lru_cache(maxsize=3)
+def load_ner_pipeline(backend: str = NER_BACKEND):
     """
     Load a biomedical NER model from HuggingFace.
     This works on any Mac M1/M2/M3/M4 without compilation.
     """
-    model_name = "d4data/biomedical-ner-all"
+    model_name = NER_MODEL_NAME
     tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForTokenClassification
+            model = ORTModelForTokenClassification.from_pretrained(model_name, export=True)
+            return pipeline("ner", model=model, tokenizer=tokenizer, aggregation_strategy="simple")
+        except ImportError:
+            print("optimum[onnxruntime] is not installed, falling back to the PyTorch NER model")
+
     model = AutoModelForTokenClassification.from_pretrained(model_name)
+
+    if backend == "int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
     return pipeline("ner", model=model, tokenizer=tokenizer, aggregation_strategy="simple")
 
-def extract_medical_entities(text: str):
+def split_into_windows(text: str, tokenizer, window_tokens: int = NER_WINDOW_TOKENS, overlap: int = NER_WINDOW_OVERLAP):
     """
-    Extract medical entities from text using BioClinicalBERT-based NER.
-    Returns dict with categorized entities.
+    Split text into overlapping windows of at most window_tokens tokens.
+    Returns a list of (char_start, char_end) spans into text.
+    """
+    offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+
+    if len(offsets) <= window_tokens:
+        return [(0, len(text))]
+
+    spans = []
+    step = window_tokens - overlap
+    start = 0
+    while True:
+        end = min(start + window_tokens, len(offsets))
+        spans.append((offsets[start][0], offsets[end - 1][1]))
+        if end == len(offsets):
+            break
+        start += step
+
+    return spans
+
+def merge_window_entities(window_outputs):
+    """
+    Merge entities found in overlapping windows.
+    window_outputs is a list of (char_offset, pipeline_output). Where spans
+    overlap, the longer entity wins (an entity cut at a window edge is seen
+    whole in the neighbouring window), then the higher score.
+    """
+    entities = []
+    for offset, output in window_outputs:
+        for item in output:
+            item = dict(item)
+            item["start"] += offset
+            item["end"] += offset
+            entities.append(item)
+
+    entities.sort(key=lambda e: (e["start"], -(e["end"] - e["start"]), -e["score"]))
+
+    merged = []
+    for ent in entities:
+        if merged and ent["start"] < merged[-1]["end"]:
+            last = merged[-1]
+            longer = (ent["end"] - ent["start"]) > (last["end"] - last["start"])
+            if longer or ((ent["end"] - ent["start"]) == (last["end"] - last["start"]) and ent["score"] > last["score"]):
+                merged[-1] = ent
+            continue
+        merged.append(ent)
+
+    return merged
+
+def run_ner(texts, backend: str = NER_BACKEND, batch_size: int = NER_BATCH_SIZE):
+    """
+    Run NER over texts of any length.
+    All windows of all texts go through the pipeline as one batch.
+    Returns raw entity lists (with absolute char offsets), one per text.
     """
-    if not text.strip():
-        return {}
+    ner_pipeline = load_ner_pipeline(backend)
 
-    ner_pipeline = load_ner_pipeline()
-    output = ner_pipeline(text)
+    windows = []
+    for i, text in enumerate(texts):
+        for start, end in split_into_windows(text, ner_pipeline.tokenizer):
+            windows.append((i, start, text[start:end]))
 
+    outputs = ner_pipeline([w[2] for w in windows], batch_size=batch_size)
+
+    per_text = [[] for _ in texts]
+    for (i, start, _), output in zip(windows, outputs):
+        per_text[i].append((start, output))
+
+    return [merge_window_entities(w) for w in per_text]
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def _cache_get(key):
+    with _entity_cache_lock:
+        entities = _entity_cache.get(key)
+        if entities is not None:
+            _entity_cache.move_to_end(key)
+        return entities
+
+def _cache_put(key, entities):
+    with _entity_cache_lock:
+        _entity_cache[key] = entities
+        _entity_cache.move_to_end(key)
+        while len(_entity_cache) > NER_CACHE_SIZE:
+            _entity_cache.popitem(last=False)
+
+def categorize_entities(output):
+    """
+    Group raw pipeline output into medical entity categories.
+    """
     entities = {
         "diseases": [],
         "symptoms": [],
@@ -54,4 +169,47 @@ def extract_medical_entities(text: str):
     for key in entities:
         entities[key] = list(set(entities[key]))
 
-    return entities
\ No newline at end of file
+    return entities
+
+def extract_medical_entities_batch(texts, batch_size: int = NER_BATCH_SIZE):
+    """
+    Extract medical entities for many texts at once.
+    Texts not in the cache go through the NER pipeline in one batched call
+    (long texts as overlapping windows); results are memoized by text hash.
+    Returns one dict per input text.
+    """
+    results = [None] * len(texts)
+    pending = {}
+
+    for i, text in enumerate(texts):
+        if not text.strip():
+            results[i] = {}
+            continue
+
+        key = _text_key(text)
+        cached = _cache_get(key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            # Identical texts in the same batch are only run once
+            pending.setdefault(key, (text, []))[1].append(i)
+
+    if pending:
+        keys = list(pending)
+        outputs = run_ner([pending[k][0] for k in keys], batch_size=batch_size)
+
+        for key, output in zip(keys, outputs):
+            entities = categorize_entities(output)
+            _cache_put(key, entities)
+            for i in pending[key][1]:
+                results[i] = entities
+
+    # Copy so callers can't mutate cached entries
+    return [{k: list(v) for k, v in r.items()} for r in results]
+
+def extract_medical_entities(text: str):
+    """
+    Extract medical entities from text using BioClinicalBERT-based NER.
+    Returns dict with categorized entities.
+    """
+    return extract_medical_entities_batch([text])[0]
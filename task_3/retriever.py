@@ -1,3 +1,4 @@
+import csv
 import json
 from langchain_community.document_loaders import CSVLoader
 from langchain_community.vectorstores import FAISS
@@ -7,10 +8,19 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 import google.generativeai as genai
 from langchain_community.embeddings import HuggingFaceInstructEmbeddings
 from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnableMap, RunnablePassthrough
+from langchain_core.runnables import RunnableMap, RunnablePassthrough, RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
-from ner import extract_medical_entities
+from ner import extract_medical_entities_batch
+from entity_index import ENTITY_INDEX_PATH, build_entity_index, load_entity_index, row_positions, entity_aware_search
+from functools import lru_cache
 import os
+import sys
+
+# Modules shared with the other apps (answer_store, faq_fast_path) live in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_store import INDEX_MODE, index_content_columns, mark_question_documents, build_answer_store, attach_answers, fetch_answers, fetch_questions, answer_store_path
+from faq_fast_path import FAQFastPath
 import traceback
 
 
@@ -33,18 +43,30 @@ instructor_embeddings = HuggingFaceInstructEmbeddings(
 
 vectordb_file_path = "vector_db_store"
 
+dataset_path = "data/medquad.csv"
+
+# Extra columns written by task_3/ingest.py, kept as metadata for filtering
+MEDQUAD_METADATA_COLUMNS = ["document_id", "question_id", "focus", "qtype"]
+
+def available_metadata_columns(csv_path):
+    """Metadata columns present in the CSV (older exports only have prompt/response)"""
+    with open(csv_path, "r", newline="", encoding="latin-1") as f:
+        header = next(csv.reader(f), [])
+    return [col for col in MEDQUAD_METADATA_COLUMNS if col in header]
+
 def create_vector_store():
-    dataset_path = "data/medquad.csv" 
     
     try:
         # Load CSV
         loader = CSVLoader(
             file_path=dataset_path,
             source_column="prompt",   # column to extract data from
+            content_columns=index_content_columns(),  # question-only by default, see answer_store.py
+            metadata_columns=available_metadata_columns(dataset_path),
             encoding="latin-1"
         )
 
-        data = loader.load()
+        data = mark_question_documents(loader.load())
 
         print("Step 2: Loaded", len(data), "documents")
 
@@ -56,17 +78,62 @@ def create_vector_store():
         # Save vector database locally
         vectordb.save_local(vectordb_file_path)
 
+        # Answers are looked up by row id for the top-k hits only
+        build_answer_store(dataset_path, vectordb_file_path)
+
+        # Entity postings are row ids too; rebuild them when the index is in use
+        if os.path.exists(ENTITY_INDEX_PATH):
+            build_entity_index(dataset_path)
+
         print("Vector database created and saved at: ", vectordb_file_path)
+
+        load_vector_store.cache_clear()
+        get_faq_fast_path.cache_clear()
     except Exception as e:
         print("ERROR OCCURRED:")
         print(traceback.format_exc())
         raise
 
 
+@lru_cache(maxsize=1)
+def load_vector_store():
+    """
+    Load the FAISS store once. When an entity index built from the same
+    rows exists, also map csv rows to FAISS positions for entity-aware search.
+    """
+    vectordb = FAISS.load_local(vectordb_file_path, instructor_embeddings, allow_dangerous_deserialization=True)
+    entity_index = load_entity_index()
+    positions = row_positions(vectordb, entity_index["fingerprint"]) if entity_index is not None else None
+    return vectordb, positions
+
+
+@lru_cache(maxsize=1)
+def get_faq_fast_path():
+    """
+    Exact question lookup, plus nearest-question matching when the main
+    index embeds questions only (INDEX_MODE=question).
+
+    In question mode both tiers read the answer store built with the FAISS
+    index, not the current CSV, whose rows may have moved since.
+    """
+    if INDEX_MODE != "question":
+        return FAQFastPath.from_csv(dataset_path)
+
+    questions = fetch_questions(vectordb_file_path)
+    if questions is None:
+        print("FAQ fast path disabled: answer store missing or outdated, rebuild the knowledgebase")
+        return FAQFastPath({}, lambda row: None)
+
+    vectordb, _ = load_vector_store()
+    answer_for_row = lambda row: fetch_answers(vectordb_file_path, [row]).get(row)
+
+    return FAQFastPath.from_questions(questions, answer_for_row, vectordb=vectordb)
+
+
 def retrieve_context():
     # embeddings = SentenceTransformer(EMBED_MODEL)
 
-    vectordb = FAISS.load_local(vectordb_file_path, instructor_embeddings, allow_dangerous_deserialization=True)
+    vectordb, positions = load_vector_store()
 
     # vectordb = FAISS.load_local(
     #     "vectorstore/faiss_index",
@@ -75,7 +142,13 @@ def retrieve_context():
     # )
 
     # Create a retriever for querying the vector database
-    retriever = vectordb.as_retriever(score_threshold=0.8)
+    if positions is not None:
+        # Query entities pre-filter / boost candidates (see entity_index.py)
+        retriever = RunnableLambda(lambda q: entity_aware_search(vectordb, q, positions=positions))
+    else:
+        retriever = vectordb.as_retriever(score_threshold=0.8)
+
+    retriever = retriever | RunnableLambda(lambda docs: attach_answers(docs, vectordb_file_path))
 
     rag = build_rag_chain(retriever)
 
@@ -115,16 +188,35 @@ def build_rag_chain(retriever):
 """
 Complete wrapper with RAG pipeline & NER extraction.
 """
-def answer_with_entities(question: str):
-    
+def stream_answer(question: str):
+    """
+    Curated MedQuAD answer for (near) exact question matches, no LLM call;
+    otherwise the RAG answer, as an iterator of text chunks.
+    """
+    faq_hit = get_faq_fast_path().lookup(question)
+
+    if faq_hit:
+        return {"stream": iter([faq_hit["answer"]]), "from_faq": True}
+
     rag = retrieve_context()
-    response = rag.invoke(question)
+    return {"stream": rag.stream(question), "from_faq": False}
 
-    query_entities = extract_medical_entities(question)
-    answer_entities = extract_medical_entities(response)
+def detect_entities(question: str, answer: str):
+    # One batched NER pass for both texts (cached results are reused)
+    query_entities, answer_entities = extract_medical_entities_batch([question, answer])
 
     return {
-        "answer": response,
         "query_entities": query_entities,
         "answer_entities": answer_entities
-    }
\ No newline at end of file
+    }
+
+def answer_with_entities(question: str):
+
+    response = stream_answer(question)
+    answer = "".join(response["stream"])
+
+    return {
+        "answer": answer,
+        "from_faq": response["from_faq"],
+        **detect_entities(question, answer)
+    }
@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+
+from arxiv_index import ARXIV_INDEX_DIR, DOMAIN_CODES
+
+BI_ENCODER_NAME = "all-mpnet-base-v2"
+EMBEDDING_DIM = 768
+
+ARXIV_EMBEDDING_DIR = "arxiv_embeddings"
+
+# HNSW graph parameters
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 128
+
+# Embedding stores kept open at once (each holds its HNSW graph and fp16 vectors in RAM)
+EMBEDDING_STORE_CACHE_SIZE = 2
+
+# ============================================================
+# Offline embedding job (resumable)
+# ============================================================
+
+def _paths(domain_code: str, out_dir: str = ARXIV_EMBEDDING_DIR):
+    base = os.path.join(out_dir, domain_code)
+    return {
+        "dir": base,
+        "matrix": os.path.join(base, "embeddings.f16"),
+        "progress": os.path.join(base, "progress.json"),
+        "ann": os.path.join(base, "hnsw.faiss"),
+    }
+
+def _load_progress(path: str):
+    if not os.path.exists(path):
+        return {"done": 0}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _save_progress(path: str, progress: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(progress, f)
+    os.replace(tmp, path)
+
+def _index_signature(domain_code: str):
+    """
+    (num_docs, sha1 of the document ids) of the current BM25 index.
+    A rebuild that keeps the document count but changes the order or the
+    papers still changes the fingerprint.
+    """
+    index_dir = os.path.join(ARXIV_INDEX_DIR, domain_code)
+    with open(os.path.join(index_dir, "meta.json"), "r", encoding="utf-8") as f:
+        num_docs = json.load(f)["num_docs"]
+
+    digest = hashlib.sha1()
+    ids_path = os.path.join(index_dir, "ids.txt")
+    if os.path.exists(ids_path):
+        with open(ids_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    else:
+        # Indexes built before ids.txt existed
+        with open(os.path.join(index_dir, "docs.jsonl"), "rb") as f:
+            for line in f:
+                digest.update(json.loads(line)["id"].encode("utf-8") + b"\n")
+
+    return num_docs, digest.hexdigest()
+
+def embed_domain(domain_code: str, model=None, chunk_size: int = 4096, batch_size: int = 64):
+    """
+    Embed every abstract of the domain (row i = doc i of the BM25 index)
+    into a float16 memmap. Progress is checkpointed after each chunk, so an
+    interrupted run continues where it stopped.
+    """
+    index_dir = os.path.join(ARXIV_INDEX_DIR, domain_code)
+    num_docs, ids_sha1 = _index_signature(domain_code)
+
+    paths = _paths(domain_code)
+    os.makedirs(paths["dir"], exist_ok=True)
+    progress = _load_progress(paths["progress"])
+
+    if "num_docs" in progress and (progress["num_docs"], progress.get("ids_sha1")) != (num_docs, ids_sha1):
+        # BM25 index was rebuilt; rows no longer line up
+        print(f"[embed] {domain_code}: BM25 index changed, starting over")
+        progress = {"done": 0}
+
+    if num_docs == 0:
+        _save_progress(paths["progress"], {"done": 0, "num_docs": 0, "ids_sha1": ids_sha1, "complete": True})
+        return
+
+    if progress.get("complete"):
+        print(f"[embed] {domain_code}: already complete ({num_docs} abstracts)")
+        return
+
+    mode = "r+" if os.path.exists(paths["matrix"]) and progress["done"] > 0 else "w+"
+    matrix = np.memmap(paths["matrix"], dtype=np.float16, mode=mode, shape=(num_docs, EMBEDDING_DIM))
+
+    if model is None:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(BI_ENCODER_NAME)
+    done = progress["done"]
+    start = time.time()
+
+    with open(os.path.join(index_dir, "docs.jsonl"), "r", encoding="utf-8") as f:
+        for _ in range(done):
+            f.readline()
+
+        while done < num_docs:
+            abstracts = []
+            for _ in range(min(chunk_size, num_docs - done)):
+                abstracts.append(json.loads(f.readline())["abstract"])
+
+            vecs = model.encode(abstracts, batch_size=batch_size, normalize_embeddings=True)
+            matrix[done:done + len(abstracts)] = vecs.astype(np.float16)
+            matrix.flush()
+
+            done += len(abstracts)
+            _save_progress(paths["progress"], {"done": done, "num_docs": num_docs, "ids_sha1": ids_sha1})
+
+            rate = (done - progress["done"]) / max(time.time() - start, 1e-6)
+            print(f"[embed] {domain_code}: {done}/{num_docs} ({rate:.0f} abstracts/s)")
+
+    _save_progress(paths["progress"], {"done": done, "num_docs": num_docs, "ids_sha1": ids_sha1, "complete": True})
+
+def build_ann_index(domain_code: str, chunk_size: int = 50000):
+    """
+    Build an HNSW (inner product) index over the finished embedding matrix.
+    Vectors are stored as float16 in the index too (IndexHNSWSQ), so it
+    takes half the memory of a float32 IndexHNSWFlat copy.
+    """
+    import faiss
+
+    paths = _paths(domain_code)
+    progress = _load_progress(paths["progress"])
+    if not progress.get("complete") or not progress.get("num_docs"):
+        print(f"[ann] {domain_code}: embeddings not complete, skipping")
+        return
+
+    matrix = np.memmap(paths["matrix"], dtype=np.float16, mode="r", shape=(progress["num_docs"], EMBEDDING_DIM))
+
+    index = faiss.IndexHNSWSQ(EMBEDDING_DIM, faiss.ScalarQuantizer.QT_fp16, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    if not index.is_trained:
+        index.train(np.asarray(matrix[:chunk_size], dtype=np.float32))
+
+    for start in range(0, matrix.shape[0], chunk_size):
+        index.add(np.asarray(matrix[start:start + chunk_size], dtype=np.float32))
+
+    faiss.write_index(index, paths["ann"])
+    load_embedding_store.cache_clear()
+    print(f"[ann] {domain_code}: HNSW index over {index.ntotal} abstracts saved")
+
+# ============================================================
+# Query time
+# ============================================================
+
+class EmbeddingStore:
+    """
+    Precomputed abstract embeddings (float16 memmap) + HNSW index of one domain.
+    """
+
+    def __init__(self, domain_code: str):
+        import faiss
+
+        paths = _paths(domain_code)
+        progress = _load_progress(paths["progress"])
+
+        self.matrix = np.memmap(paths["matrix"], dtype=np.float16, mode="r", shape=(progress["num_docs"], EMBEDDING_DIM))
+        self.index = faiss.read_index(paths["ann"])
+        self.index.hnsw.efSearch = HNSW_EF_SEARCH
+
+    def search(self, query_emb, top_k: int = 100):
+        """[(doc_index, cosine), ...] nearest abstracts to the (normalized) query"""
+        q = np.asarray(query_emb, dtype=np.float32).reshape(1, -1)
+        scores, ids = self.index.search(q, top_k)
+        return [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0]
+
+    def scores(self, query_emb, doc_indices):
+        """Cosine of the query with the given abstracts, from the memmap"""
+        if not len(doc_indices):
+            return np.zeros(0, dtype=np.float32)
+        q = np.asarray(query_emb, dtype=np.float32)
+        return np.asarray(self.matrix[np.asarray(doc_indices)], dtype=np.float32) @ q
+
+def load_embedding_matrix(domain_code: str):
+    """Finished float16 embedding memmap of the domain, or None"""
+    paths = _paths(domain_code)
+    progress = _load_progress(paths["progress"])
+    if not progress.get("complete") or not progress.get("num_docs"):
+        return None
+    if (progress["num_docs"], progress.get("ids_sha1")) != _index_signature(domain_code):
+        return None
+    return np.memmap(paths["matrix"], dtype=np.float16, mode="r", shape=(progress["num_docs"], EMBEDDING_DIM))
+
+@lru_cache(maxsize=EMBEDDING_STORE_CACHE_SIZE)
+def load_embedding_store(domain_code: str):
+    paths = _paths(domain_code)
+    if not os.path.exists(paths["ann"]):
+        return None
+
+    # Rows must line up with the current BM25 index documents
+    progress = _load_progress(paths["progress"])
+    if (progress.get("num_docs"), progress.get("ids_sha1")) != _index_signature(domain_code):
+        print(f"[ann] {domain_code}: embeddings are out of date with the BM25 index, ignoring them")
+        return None
+
+    return EmbeddingStore(domain_code)
+
+if __name__ == "__main__":
+    # python arxiv_embeddings.py [cs,astro-ph,...]
+    from sentence_transformers import SentenceTransformer
+
+    domains = sys.argv[1].split(",") if len(sys.argv) > 1 else DOMAIN_CODES
+    model = SentenceTransformer(BI_ENCODER_NAME)
+    for d in domains:
+        embed_domain(d, model=model)
+        build_ann_index(d)
@@ -0,0 +1,290 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+from array import array
+from functools import lru_cache
+from typing import List, Dict
+
+import numpy as np
+
+ARXIV_JSON_PATH = "arxiv-metadata-oai-snapshot.json"
+ARXIV_INDEX_DIR = "arxiv_index"
+
+DOMAIN_CODES = [
+    "cs", "math", "cond-mat", "astro-ph", "physics",
+    "hep-ph", "quant-ph", "hep-th", "gr-qc", "eess"
+]
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no
+nor not now of off on once only or other our ours ourselves out over own same
+she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours yourself
+yourselves also using use used via based show shows shown may might must
+however thus within without whether explain describe discuss paper papers
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+# ============================================================
+# Tokenization
+# ============================================================
+
+def tokenize(text: str) -> List[str]:
+    return [
+        t for t in _TOKEN_RE.findall(text.lower())
+        if len(t) > 1 and t not in STOPWORDS
+    ]
+
+def paper_domains(categories: str, domains=DOMAIN_CODES) -> List[str]:
+    """
+    Domains a paper belongs to, including cross-lists.
+    "astro-ph.GA cs.LG" -> ["astro-ph", "cs"]; "math-ph" is not "math".
+    """
+    archives = {c.split(".")[0] for c in categories.split()}
+    return [d for d in domains if d in archives]
+
+# ============================================================
+# Offline index build
+# ============================================================
+
+class _DomainBuilder:
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        self.docs_file = open(os.path.join(out_dir, "docs.jsonl"), "wb")
+        self.ids_file = open(os.path.join(out_dir, "ids.txt"), "w", encoding="utf-8")
+        self.offsets = array("q")
+        self.doc_lens = array("I")
+        self.postings = {}  # term -> (array of doc ids, array of tf)
+
+    def add(self, paper: dict, tokens: List[str]):
+        doc_id = len(self.offsets)
+
+        self.offsets.append(self.docs_file.tell())
+        record = {
+            "id": paper.get("id"),
+            "title": paper.get("title", ""),
+            "abstract": paper.get("abstract", "")
+        }
+        self.docs_file.write(json.dumps(record).encode("utf-8") + b"\n")
+        self.ids_file.write(f"{record['id'] or ''}\n")
+        self.doc_lens.append(len(tokens))
+
+        tf = {}
+        for t in tokens:
+            tf[t] = tf.get(t, 0) + 1
+
+        for term, count in tf.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array("I"), array("H"))
+            entry[0].append(doc_id)
+            entry[1].append(min(count, 65535))
+
+    def finish(self):
+        self.docs_file.close()
+        self.ids_file.close()
+
+        np.save(os.path.join(self.out_dir, "offsets.npy"), np.frombuffer(self.offsets, dtype=np.int64))
+        np.save(os.path.join(self.out_dir, "doc_lens.npy"), np.frombuffer(self.doc_lens, dtype=np.uint32))
+
+        # Postings laid out term after term; vocab maps term -> [start, df]
+        vocab = {}
+        doc_ids = open(os.path.join(self.out_dir, "postings_docs.bin"), "wb")
+        tfs = open(os.path.join(self.out_dir, "postings_tf.bin"), "wb")
+        start = 0
+        for term, (ids, counts) in self.postings.items():
+            vocab[term] = [start, len(ids)]
+            doc_ids.write(ids.tobytes())
+            tfs.write(counts.tobytes())
+            start += len(ids)
+        doc_ids.close()
+        tfs.close()
+
+        meta = {
+            "num_docs": len(self.offsets),
+            "avg_doc_len": (sum(self.doc_lens) / len(self.doc_lens)) if self.doc_lens else 0.0,
+            "num_terms": len(vocab),
+        }
+        with open(os.path.join(self.out_dir, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(vocab, f)
+        with open(os.path.join(self.out_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        return meta
+
+def build_bm25_index(snapshot_path: str = ARXIV_JSON_PATH, out_dir: str = ARXIV_INDEX_DIR, domains=DOMAIN_CODES):
+    """
+    One pass over the arXiv snapshot, writing a BM25 inverted index per
+    domain to out_dir/<domain>/. Cross-listed papers go into every domain
+    they are listed in.
+    """
+    from arxiv_shards import has_shards
+
+    if all(has_shards(d) for d in domains):
+        build_bm25_index_from_shards(out_dir, domains)
+        return
+
+    builders = {d: _DomainBuilder(os.path.join(out_dir, d)) for d in domains}
+    start = time.time()
+
+    with open(snapshot_path, "r") as f:
+        for n, line in enumerate(f, start=1):
+            paper = json.loads(line)
+            targets = paper_domains(paper.get("categories", ""), domains)
+            if not targets:
+                continue
+
+            tokens = tokenize(f"{paper.get('title', '')} {paper.get('abstract', '')}")
+            for d in targets:
+                builders[d].add(paper, tokens)
+
+            if n % 100000 == 0:
+                print(f"[index] {n} papers scanned ({time.time() - start:.0f}s)")
+
+    for d, builder in builders.items():
+        meta = builder.finish()
+        print(f"[index] {d}: {meta['num_docs']} papers, {meta['num_terms']} terms")
+
+    load_domain_index.cache_clear()
+
+def build_bm25_index_from_shards(out_dir: str = ARXIV_INDEX_DIR, domains=DOMAIN_CODES):
+    """
+    Build each domain's index from its columnar shard (python arxiv_shards.py),
+    one domain at a time, instead of re-reading the whole snapshot.
+    """
+    from arxiv_shards import iter_domain_batches
+
+    for d in domains:
+        builder = _DomainBuilder(os.path.join(out_dir, d))
+        for batch in iter_domain_batches(d, ["id", "title", "abstract"]):
+            for paper in batch.to_pylist():
+                builder.add(paper, tokenize(f"{paper['title']} {paper['abstract']}"))
+
+        meta = builder.finish()
+        print(f"[index] {d}: {meta['num_docs']} papers, {meta['num_terms']} terms")
+
+    load_domain_index.cache_clear()
+
+# ============================================================
+# Query time
+# ============================================================
+
+def _memmap(path: str, dtype):
+    # np.memmap cannot map an empty file (domain with no papers)
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+class DomainIndex:
+    """
+    Memory-mapped BM25 index of one domain.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+
+        with open(os.path.join(index_dir, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(index_dir, "vocab.json"), "r", encoding="utf-8") as f:
+            self.vocab = json.load(f)
+
+        self.num_docs = self.meta["num_docs"]
+        self.avg_doc_len = self.meta["avg_doc_len"] or 1.0
+
+        self.offsets = np.load(os.path.join(index_dir, "offsets.npy"), mmap_mode="r")
+        self.doc_lens = np.load(os.path.join(index_dir, "doc_lens.npy"), mmap_mode="r")
+        self.postings_docs = _memmap(os.path.join(index_dir, "postings_docs.bin"), np.uint32)
+        self.postings_tf = _memmap(os.path.join(index_dir, "postings_tf.bin"), np.uint16)
+
+        # Per-document BM25 length normalisation, computed once
+        self.norm = BM25_K1 * (1 - BM25_B + BM25_B * np.asarray(self.doc_lens, dtype=np.float32) / self.avg_doc_len)
+
+    def search(self, query: str, top_k: int = 200):
+        """
+        Return [(doc_index, score), ...] for the top_k BM25 matches.
+        """
+        terms = set(tokenize(query))
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        matched = False
+
+        for term in terms:
+            entry = self.vocab.get(term)
+            if entry is None:
+                continue
+            start, df = entry
+            doc_ids = self.postings_docs[start:start + df]
+            tf = self.postings_tf[start:start + df].astype(np.float32)
+
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            scores[doc_ids] += idf * tf * (BM25_K1 + 1) / (tf + self.norm[doc_ids])
+            matched = True
+
+        if not matched:
+            return []
+
+        k = min(top_k, int(np.count_nonzero(scores)))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def get_docs(self, doc_indices) -> List[Dict]:
+        docs = []
+        with open(os.path.join(self.index_dir, "docs.jsonl"), "rb") as f:
+            for i in doc_indices:
+                f.seek(int(self.offsets[i]))
+                doc = json.loads(f.readline())
+                doc["doc_index"] = int(i)
+                docs.append(doc)
+        return docs
+
+    def iter_ids(self):
+        """arXiv ids in document order, streamed without loading abstracts"""
+        ids_path = os.path.join(self.index_dir, "ids.txt")
+        if os.path.exists(ids_path):
+            with open(ids_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield line.rstrip("\n")
+            return
+
+        # Indexes built before ids.txt existed
+        with open(os.path.join(self.index_dir, "docs.jsonl"), "rb") as f:
+            for line in f:
+                yield json.loads(line)["id"]
+
+@lru_cache(maxsize=len(DOMAIN_CODES))
+def load_domain_index(domain_code: str, index_dir: str = ARXIV_INDEX_DIR):
+    path = os.path.join(index_dir, domain_code)
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        return None
+    return DomainIndex(path)
+
+def search_candidates(domain_code: str, query: str, max_docs: int = 200):
+    """
+    Top-k BM25 candidates for the domain, in the same shape as
+    stream_arxiv_candidates(). Returns None when no index is built.
+    """
+    index = load_domain_index(domain_code)
+    if index is None:
+        return None
+
+    hits = index.search(query, top_k=max_docs)
+    return index.get_docs([i for i, _ in hits])
+
+if __name__ == "__main__":
+    # python arxiv_index.py [snapshot_path] [cs,math,...]
+    snapshot = sys.argv[1] if len(sys.argv) > 1 else ARXIV_JSON_PATH
+    domains = sys.argv[2].split(",") if len(sys.argv) > 2 else DOMAIN_CODES
+    build_bm25_index(snapshot, domains=domains)
@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from arxiv_index import ARXIV_JSON_PATH, DOMAIN_CODES, paper_domains
+
+ARXIV_SHARD_DIR = "arxiv_shards"
+
+# "zstd" / "lz4" shrink the shards; "none" keeps them zero-copy when memory-mapped
+SHARD_COMPRESSION = os.getenv("ARXIV_SHARD_COMPRESSION", "zstd")
+
+SHARD_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("title", pa.string()),
+    ("abstract", pa.string()),
+    ("categories", pa.string()),
+    ("date", pa.string()),
+    # bit i set <=> paper is listed in DOMAIN_CODES[i] (cross-lists included)
+    ("domain_mask", pa.uint16()),
+])
+
+DOMAIN_BITS = {d: 1 << i for i, d in enumerate(DOMAIN_CODES)}
+
+# ============================================================
+# Conversion (offline, multi-process)
+# ============================================================
+
+def _chunk_ranges(path: str, parts: int):
+    size = os.path.getsize(path)
+    step = max(1, size // parts)
+    bounds = list(range(0, size, step)) + [size]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+class _ShardWriter:
+    def __init__(self, path: str, compression: str, batch_size: int):
+        options = pa.ipc.IpcWriteOptions(compression=None if compression == "none" else compression)
+        self.writer = pa.ipc.new_file(path, SHARD_SCHEMA, options=options)
+        self.batch_size = batch_size
+        self.rows = {name: [] for name in SHARD_SCHEMA.names}
+        self.count = 0
+
+    def add(self, record: dict):
+        for name in SHARD_SCHEMA.names:
+            self.rows[name].append(record[name])
+        if len(self.rows["id"]) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows["id"]:
+            return
+        self.writer.write_batch(pa.record_batch(
+            [pa.array(self.rows[name], type=SHARD_SCHEMA.field(name).type) for name in SHARD_SCHEMA.names],
+            schema=SHARD_SCHEMA
+        ))
+        self.count += len(self.rows["id"])
+        self.rows = {name: [] for name in SHARD_SCHEMA.names}
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+def _convert_range(args):
+    """
+    Worker: convert the snapshot lines starting in [start, end) into
+    out_dir/<domain>/part-<part>.arrow files.
+    """
+    snapshot_path, start, end, out_dir, part, compression, batch_size = args
+    writers = {}
+
+    with open(snapshot_path, "rb") as f:
+        # A line belongs to the chunk its first byte falls in
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()
+
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+
+            paper = json.loads(line)
+            categories = paper.get("categories", "")
+            domains = paper_domains(categories)
+            if not domains:
+                continue
+
+            mask = 0
+            for d in domains:
+                mask |= DOMAIN_BITS[d]
+
+            record = {
+                "id": paper.get("id"),
+                "title": paper.get("title", ""),
+                "abstract": paper.get("abstract", ""),
+                "categories": categories,
+                "date": paper.get("update_date", ""),
+                "domain_mask": mask,
+            }
+
+            for d in domains:
+                writer = writers.get(d)
+                if writer is None:
+                    os.makedirs(os.path.join(out_dir, d), exist_ok=True)
+                    writer = writers[d] = _ShardWriter(
+                        os.path.join(out_dir, d, f"part-{part:04d}.arrow"), compression, batch_size
+                    )
+                writer.add(record)
+
+    counts = {}
+    for d, writer in writers.items():
+        writer.close()
+        counts[d] = writer.count
+    return counts
+
+def convert_snapshot(snapshot_path: str = ARXIV_JSON_PATH, out_dir: str = ARXIV_SHARD_DIR,
+                     workers: int = None, compression: str = SHARD_COMPRESSION, batch_size: int = 20000):
+    """
+    Split the JSON-lines snapshot into per-domain Arrow IPC shards.
+    The file is cut into byte ranges converted in parallel; each worker
+    writes its own part file per domain.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.time()
+
+    os.makedirs(out_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(out_dir, "*", "part-*.arrow")) + glob.glob(os.path.join(out_dir, "manifest.json")):
+        os.remove(old)
+
+    ranges = _chunk_ranges(snapshot_path, workers * 4)
+    jobs = [
+        (snapshot_path, s, e, out_dir, part, compression, batch_size)
+        for part, (s, e) in enumerate(ranges)
+    ]
+
+    totals = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for counts in pool.map(_convert_range, jobs):
+            for d, n in counts.items():
+                totals[d] = totals.get(d, 0) + n
+
+    # Manifest marks the conversion complete (domains with no papers have no part files)
+    manifest = {d: totals.get(d, 0) for d in DOMAIN_CODES}
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    for d in DOMAIN_CODES:
+        print(f"[shards] {d}: {manifest[d]} papers")
+    print(f"[shards] done in {time.time() - start:.0f}s")
+
+    return totals
+
+# ============================================================
+# Reading (query time)
+# ============================================================
+
+def shard_paths(domain_code: str, shard_dir: str = ARXIV_SHARD_DIR) -> List[str]:
+    return sorted(glob.glob(os.path.join(shard_dir, domain_code, "part-*.arrow")))
+
+def has_shards(domain_code: str, shard_dir: str = ARXIV_SHARD_DIR) -> bool:
+    manifest_path = os.path.join(shard_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return domain_code in json.load(f)
+
+def iter_domain_batches(domain_code: str, columns: List[str] = None):
+    """
+    Yield record batches of the domain's shards (memory-mapped, only the
+    requested columns are touched).
+    """
+    for path in shard_paths(domain_code):
+        with pa.memory_map(path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield batch.select(columns) if columns else batch
+
+def domain_filter(batch, domains: List[str]):
+    """Boolean mask of rows listed in all of `domains` (bitmap test)"""
+    mask = 0
+    for d in domains:
+        mask |= DOMAIN_BITS[d]
+    return pc.equal(pc.bit_wise_and(batch.column("domain_mask"), pa.scalar(mask, pa.uint16())), pa.scalar(mask, pa.uint16()))
+
+def scan_candidates(domain_code: str, query_terms: List[str], max_docs: int = 200) -> List[Dict]:
+    """
+    Vectorised lexical scan of one domain's shard: papers whose title or
+    abstract contains any query term. Same output shape as
+    stream_arxiv_candidates().
+    """
+    candidates = []
+    if not query_terms:
+        return candidates
+
+    for batch in iter_domain_batches(domain_code, ["id", "title", "abstract"]):
+        text = pc.utf8_lower(pc.binary_join_element_wise(batch.column("title"), batch.column("abstract"), " "))
+
+        hit = None
+        for term in query_terms:
+            term_hit = pc.match_substring(text, term)
+            hit = term_hit if hit is None else pc.or_(hit, term_hit)
+
+        matched = batch.filter(hit)
+        if matched.num_rows:
+            candidates.extend(matched.to_pylist()[:max_docs - len(candidates)])
+
+        if len(candidates) >= max_docs:
+            break
+
+    return candidates
+
+if __name__ == "__main__":
+    # python arxiv_shards.py [snapshot_path] [workers]
+    snapshot = sys.argv[1] if len(sys.argv) > 1 else ARXIV_JSON_PATH
+    n_workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    convert_snapshot(snapshot, workers=n_workers)
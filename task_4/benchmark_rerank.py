@@ -0,0 +1,100 @@
+import sys
+import time
+import json
+import statistics
+
+from sentence_transformers import SentenceTransformer, CrossEncoder, util
+
+from arxiv_index import search_candidates
+from arxiv_embeddings import BI_ENCODER_NAME
+from reranker import CROSS_ENCODER_NAME, cascade_rerank, load_cross_encoder, rerank_stats
+
+QUERIES = [
+    "How do spectroscopic results distinguish between stream-fed and ring-fed accretion models for EX Hya?",
+    "Which Doppler tomogram features favour ring-fed accretion over direct stream accretion?",
+    "Dark matter halo density profiles from weak gravitational lensing",
+    "Star formation efficiency in giant molecular clouds",
+    "Fast radio burst localisation and host galaxies",
+]
+
+# (name, backend, cascade margin); margin < 0 scores every survivor
+CONFIGS = [
+    ("torch-full", "torch", -1.0),
+    ("torch-cascade", "torch", 0.1),
+    ("int8-cascade", "int8", 0.1),
+    ("onnx-cascade", "onnx", 0.1),
+]
+
+def bi_encoder_survivors(bi_encoder, domain_code: str, query: str, survivors: int):
+    candidates = search_candidates(domain_code, query, max_docs=200) or []
+    if not candidates:
+        return []
+
+    query_emb = bi_encoder.encode(query, convert_to_tensor=True)
+    doc_embs = bi_encoder.encode([c["abstract"] for c in candidates], convert_to_tensor=True)
+    scores = util.cos_sim(query_emb, doc_embs)[0].tolist()
+
+    return sorted(zip(candidates, scores), key=lambda x: x[1], reverse=True)[:survivors]
+
+def top_ids(final):
+    return [doc["id"] for (doc, _bert), _ce in final]
+
+def benchmark(domain_code: str = "astro-ph", survivors: int = 10, top_k: int = 5):
+    """
+    Compare cross-encoder reranking paths on the same bi-encoder survivors:
+    latency per query, share of survivors scored, and agreement of the
+    top_k with the previous full-precision CrossEncoder path.
+    """
+    bi_encoder = SentenceTransformer(BI_ENCODER_NAME)
+    reference_model = CrossEncoder(CROSS_ENCODER_NAME)
+
+    workload = [(q, bi_encoder_survivors(bi_encoder, domain_code, q, survivors)) for q in QUERIES]
+    workload = [(q, ranked) for q, ranked in workload if ranked]
+    if not workload:
+        print(f"No candidates; build the index first (python arxiv_index.py ... {domain_code})")
+        return {}
+
+    print(f"Benchmarking rerank on {len(workload)} queries x {survivors} survivors ({domain_code})")
+
+    reference = []
+    start = time.perf_counter()
+    for q, ranked in workload:
+        scores = reference_model.predict([(q, d[0]["abstract"]) for d in ranked])
+        final = sorted(zip(ranked, scores), key=lambda x: x[1], reverse=True)[:top_k]
+        reference.append(top_ids(final))
+    elapsed = time.perf_counter() - start
+
+    results = {"reference": {"ms_per_query": round(1000 * elapsed / len(workload), 2)}}
+    print("reference", results["reference"])
+
+    for name, backend, margin in CONFIGS:
+        load_cross_encoder(backend)                                   # exclude model load / export time
+        cascade_rerank(workload[0][0], workload[0][1], top_k, backend, margin)  # warm-up
+        rerank_stats.update({"calls": 0, "candidates": 0, "scored": 0})
+
+        overlaps = []
+        top1 = 0
+        start = time.perf_counter()
+        outputs = [cascade_rerank(q, ranked, top_k, backend, margin) for q, ranked in workload]
+        elapsed = time.perf_counter() - start
+
+        for ref_ids, final in zip(reference, outputs):
+            ids = top_ids(final)
+            overlaps.append(len(set(ids) & set(ref_ids)) / len(ref_ids))
+            top1 += bool(ids) and ids[0] == ref_ids[0]
+
+        results[name] = {
+            "ms_per_query": round(1000 * elapsed / len(workload), 2),
+            "scored_fraction": round(rerank_stats["scored"] / rerank_stats["candidates"], 3),
+            "overlap_at_k": round(statistics.mean(overlaps), 4),
+            "top1_agreement": round(top1 / len(workload), 4),
+        }
+        print(name, results[name])
+
+    return results
+
+if __name__ == "__main__":
+    # python benchmark_rerank.py [domain] [survivors]
+    domain = sys.argv[1] if len(sys.argv) > 1 else "astro-ph"
+    n_survivors = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(json.dumps(benchmark(domain, n_survivors), indent=2))
@@ -0,0 +1,272 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import statistics
+import subprocess
+import tracemalloc
+
+import psutil
+
+BENCHMARK_DIR = "arxiv_benchmark"
+RESULTS_DIR = "benchmark_results"
+
+DOMAIN = "cs"
+RELEVANT_PER_QUERY = 5
+
+TOPICS = {
+    "graph learning": "graph neural network node embedding message passing edge attention spectral convolution".split(),
+    "optimization": "gradient descent convergence stochastic convex step size momentum loss landscape".split(),
+    "language models": "language model transformer token pretraining attention decoder prompt corpus".split(),
+    "vision": "image convolutional segmentation detection pixel augmentation object backbone".split(),
+    "reinforcement learning": "policy reward agent environment value function exploration trajectory".split(),
+    "cryptography": "encryption key protocol adversary hash signature secure zero-knowledge".split(),
+    "databases": "query index transaction storage join relational latency throughput".split(),
+    "robotics": "robot manipulation grasping control motion planning sensor trajectory".split(),
+}
+
+FILLER = """we propose method results experiments show approach performance novel
+framework analysis data evaluate baseline improve demonstrate efficient
+problem task setting benchmark study proposed significant existing""".split()
+
+OTHER_CATEGORIES = ["astro-ph.GA", "math.PR", "cond-mat.str-el", "hep-th", "quant-ph"]
+
+# ============================================================
+# Synthetic snapshot + labelled queries
+# ============================================================
+
+SYLLABLES = ["ka", "zo", "ri", "len", "tor", "vi", "mex", "qua", "dra", "pel", "sun", "ox"]
+
+def _signatures(rng: random.Random, n: int):
+    """n distinct made-up method names, one per query's relevant papers"""
+    space = len(SYLLABLES) ** 3
+    if n > space:
+        raise ValueError(f"At most {space} queries can get a unique signature, got {n}")
+
+    names = []
+    for code in rng.sample(range(space), n):
+        parts = []
+        for _ in range(3):
+            code, s = divmod(code, len(SYLLABLES))
+            parts.append(SYLLABLES[s])
+        names.append("".join(parts) + "net")
+    return names
+
+def _paper(rng: random.Random, paper_id: str, topic: str, signature: str = None):
+    words = TOPICS[topic]
+    title = " ".join(rng.choices(words, k=rng.randint(4, 6)))
+    abstract = [rng.choice(words) if rng.random() < 0.6 else rng.choice(FILLER) for _ in range(rng.randint(60, 120))]
+
+    if signature:
+        title = f"{signature}: {title}"
+        for _ in range(3):
+            abstract.insert(rng.randrange(len(abstract)), signature)
+
+    if signature or rng.random() < 0.85:
+        categories = "cs.LG" if rng.random() < 0.8 else f"{rng.choice(OTHER_CATEGORIES)} cs.LG"
+    else:
+        categories = rng.choice(OTHER_CATEGORIES)
+
+    return {
+        "id": paper_id,
+        "title": title.capitalize(),
+        "abstract": " ".join(abstract).capitalize() + ".",
+        "categories": categories,
+        "update_date": "2024-01-01",
+    }
+
+def generate_snapshot(path: str, num_papers: int = 20000, num_queries: int = 50, seed: int = 0):
+    """
+    Write an arXiv-format JSON-lines snapshot and return labelled queries.
+    Each query names a made-up method that appears in exactly
+    RELEVANT_PER_QUERY papers of one topic; those papers are its relevant set.
+    """
+    rng = random.Random(seed)
+    topics = list(TOPICS)
+
+    if num_queries * RELEVANT_PER_QUERY > num_papers:
+        raise ValueError(f"{num_queries} queries need at least {num_queries * RELEVANT_PER_QUERY} papers")
+
+    # Signatures and relevant papers are drawn without replacement, so no
+    # two queries share either and every requested query is kept
+    signatures = _signatures(rng, num_queries)
+    relevant_positions = rng.sample(range(num_papers), num_queries * RELEVANT_PER_QUERY)
+
+    queries = []
+    planted = {}
+    for q, signature in enumerate(signatures):
+        topic = rng.choice(topics)
+        positions = relevant_positions[q * RELEVANT_PER_QUERY:(q + 1) * RELEVANT_PER_QUERY]
+        ids = [f"2401.{p:05d}" for p in positions]
+        for p in positions:
+            planted[p] = (topic, signature)
+
+        a, b = rng.sample(TOPICS[topic], 2)
+        queries.append({
+            "query": f"How does {signature} improve {a} and {b}?",
+            "domain": DOMAIN,
+            "relevant": ids,
+        })
+
+    with open(path, "w", encoding="utf-8") as f:
+        for p in range(num_papers):
+            topic, signature = planted.get(p, (rng.choice(topics), None))
+            f.write(json.dumps(_paper(rng, f"2401.{p:05d}", topic, signature)) + "\n")
+
+    return queries
+
+# ============================================================
+# Measurement
+# ============================================================
+
+def _ids(docs):
+    return {d["id"] for d in docs}
+
+def _recall(found_ids, relevant):
+    return len(found_ids & set(relevant)) / len(relevant)
+
+def _summary(values, digits: int = 2):
+    values = sorted(values)
+    return {
+        "mean": round(statistics.mean(values), digits),
+        "p50": round(values[len(values) // 2], digits),
+        "p95": round(values[min(len(values) - 1, int(0.95 * len(values)))], digits),
+    }
+
+def _rss_mb():
+    return round(psutil.Process().memory_info().rss / 2 ** 20, 1)
+
+def run_path(helper, name: str, candidate_fn, queries, rerank: bool = True):
+    """
+    Per-stage latency (ms) and recall for one candidate generation path,
+    followed by the bi-encoder and cross-encoder stages.
+    """
+    helper.encode_query.cache_clear()
+
+    stages = {"candidates": [], "bi_encoder": [], "cross_encoder": []}
+    recall = {"candidates": [], "bi_encoder@10": [], "cross_encoder@5": []}
+    candidate_counts = []
+
+    tracemalloc.start()
+    for q in queries:
+        start = time.perf_counter()
+        candidates = candidate_fn(q["query"])
+        stages["candidates"].append(1000 * (time.perf_counter() - start))
+        candidate_counts.append(len(candidates))
+        recall["candidates"].append(_recall(_ids(candidates), q["relevant"]))
+    _, candidate_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if rerank:
+        for q in queries:
+            candidates = candidate_fn(q["query"])
+
+            start = time.perf_counter()
+            bert_ranked = helper.rerank_with_bert(q["query"], candidates, domain_code=q["domain"])
+            stages["bi_encoder"].append(1000 * (time.perf_counter() - start))
+            recall["bi_encoder@10"].append(_recall(_ids(d for d, _ in bert_ranked), q["relevant"]))
+
+            start = time.perf_counter()
+            final = helper.cross_encode_rerank(q["query"], bert_ranked)
+            stages["cross_encoder"].append(1000 * (time.perf_counter() - start))
+            recall["cross_encoder@5"].append(_recall(_ids(d for (d, _), _ in final), q["relevant"]))
+
+    result = {
+        "latency_ms": {stage: _summary(v) for stage, v in stages.items() if v},
+        "recall": {stage: round(statistics.mean(v), 4) for stage, v in recall.items() if v},
+        "mean_candidates": round(statistics.mean(candidate_counts), 1),
+        "candidate_peak_alloc_mb": round(candidate_peak / 2 ** 20, 2),
+        "rss_mb": _rss_mb(),
+    }
+    print(name, json.dumps(result))
+    return result
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark(num_papers: int = 20000, num_queries: int = 50, rerank: bool = True, embeddings: bool = False):
+    """
+    Build every retrieval path over a fresh synthetic snapshot and measure
+    it with the same labelled queries. Offline build times are reported
+    alongside query-time results.
+    """
+    commit = _git_commit()
+    results_dir = os.path.abspath(RESULTS_DIR)
+
+    # helper.py needs a key to construct the LLM client; the benchmark never calls it
+    os.environ.setdefault("GOOGLE_API_KEY", "unused-by-benchmark")
+    import helper
+    from arxiv_index import tokenize, build_bm25_index
+    from arxiv_shards import convert_snapshot
+    from arxiv_embeddings import embed_domain, build_ann_index
+
+    helper.DEBUG = False
+
+    shutil.rmtree(BENCHMARK_DIR, ignore_errors=True)
+    os.makedirs(BENCHMARK_DIR)
+    os.chdir(BENCHMARK_DIR)
+
+    snapshot = "snapshot.json"
+    helper.ARXIV_JSON_PATH = snapshot
+
+    start = time.perf_counter()
+    queries = generate_snapshot(snapshot, num_papers, num_queries)
+    print(f"Synthetic snapshot: {num_papers} papers, {len(queries)} queries ({time.perf_counter() - start:.1f}s)")
+
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {"num_papers": num_papers, "num_queries": len(queries), "domain": DOMAIN, "rerank": rerank},
+        "build_s": {},
+        "paths": {},
+    }
+
+    report["paths"]["json_scan"] = run_path(
+        helper, "json_scan", lambda q: helper.stream_arxiv_candidates(DOMAIN, tokenize(q)), queries, rerank
+    )
+
+    start = time.perf_counter()
+    convert_snapshot(snapshot, workers=2)
+    report["build_s"]["shards"] = round(time.perf_counter() - start, 2)
+    report["paths"]["shard_scan"] = run_path(
+        helper, "shard_scan", lambda q: helper.stream_arxiv_candidates(DOMAIN, tokenize(q)), queries, rerank
+    )
+
+    start = time.perf_counter()
+    build_bm25_index(snapshot, domains=[DOMAIN])
+    report["build_s"]["bm25"] = round(time.perf_counter() - start, 2)
+    report["paths"]["bm25"] = run_path(
+        helper, "bm25", lambda q: helper.get_arxiv_candidates(DOMAIN, q), queries, rerank
+    )
+
+    if embeddings:
+        start = time.perf_counter()
+        embed_domain(DOMAIN, model=helper.bi_encoder)
+        build_ann_index(DOMAIN)
+        report["build_s"]["embeddings"] = round(time.perf_counter() - start, 2)
+        report["paths"]["bm25_ann"] = run_path(
+            helper, "bm25_ann", lambda q: helper.get_arxiv_candidates(DOMAIN, q), queries, rerank
+        )
+
+    os.makedirs(results_dir, exist_ok=True)
+    out_path = os.path.join(results_dir, f"retrieval-{(commit or 'nogit')[:10]}-{int(time.time())}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("Results written to", out_path)
+
+    return report
+
+if __name__ == "__main__":
+    # python benchmark_retrieval.py [num_papers] [num_queries] [--no-rerank] [--embeddings]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    benchmark(
+        num_papers=int(args[0]) if args else 20000,
+        num_queries=int(args[1]) if len(args) > 1 else 50,
+        rerank="--no-rerank" not in sys.argv,
+        embeddings="--embeddings" in sys.argv,
+    )
@@ -0,0 +1,302 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+from arxiv_index import DOMAIN_CODES, tokenize, load_domain_index
+from arxiv_embeddings import load_embedding_matrix
+
+ARXIV_CONCEPT_DIR = "arxiv_concepts"
+
+CONCEPT_CLUSTERS = int(os.getenv("CONCEPT_CLUSTERS", "24"))
+
+# "pca" (IncrementalPCA, default) or "umap" (needs umap-learn, fitted on a sample)
+CONCEPT_LAYOUT = os.getenv("CONCEPT_LAYOUT", "pca").lower()
+
+# Points drawn in the UI; every paper still gets coordinates for highlighting
+CONCEPT_SAMPLE_POINTS = 4000
+
+# Abstracts per cluster read for keyphrase extraction
+KEYPHRASE_DOCS_PER_CLUSTER = 500
+KEYPHRASES_PER_CLUSTER = 5
+
+_CITATION_RE = re.compile(
+    r"(?:arxiv:\s*|arxiv\.org/abs/)([a-z-]+(?:\.[a-z]{2})?/\d{7}|\d{4}\.\d{4,5})(?:v\d+)?",
+    re.IGNORECASE
+)
+
+# ============================================================
+# Offline job
+# ============================================================
+
+def _chunks(n: int, size: int):
+    for start in range(0, n, size):
+        yield start, min(start + size, n)
+
+def _fit_clusters(matrix, n_clusters: int, chunk_size: int):
+    from sklearn.cluster import MiniBatchKMeans
+
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=0, batch_size=chunk_size, n_init=3)
+    for start, end in _chunks(matrix.shape[0], chunk_size):
+        chunk = np.asarray(matrix[start:end], dtype=np.float32)
+        if chunk.shape[0] >= n_clusters:
+            kmeans.partial_fit(chunk)
+
+    labels = np.empty(matrix.shape[0], dtype=np.int32)
+    for start, end in _chunks(matrix.shape[0], chunk_size):
+        labels[start:end] = kmeans.predict(np.asarray(matrix[start:end], dtype=np.float32))
+    return labels
+
+def _fit_layout(matrix, layout: str, chunk_size: int):
+    if layout == "umap":
+        try:
+            import umap
+
+            rng = np.random.default_rng(0)
+            fit_rows = np.sort(rng.choice(matrix.shape[0], min(matrix.shape[0], 50000), replace=False))
+            reducer = umap.UMAP(n_components=2, metric="cosine", random_state=0)
+            reducer.fit(np.asarray(matrix[fit_rows], dtype=np.float32))
+
+            coords = np.empty((matrix.shape[0], 2), dtype=np.float32)
+            for start, end in _chunks(matrix.shape[0], chunk_size):
+                coords[start:end] = reducer.transform(np.asarray(matrix[start:end], dtype=np.float32))
+            return coords, "umap"
+        except ImportError:
+            print("umap-learn is not installed, falling back to incremental PCA")
+
+    from sklearn.decomposition import IncrementalPCA
+
+    pca = IncrementalPCA(n_components=2)
+    for start, end in _chunks(matrix.shape[0], chunk_size):
+        chunk = np.asarray(matrix[start:end], dtype=np.float32)
+        if chunk.shape[0] >= 2:
+            pca.partial_fit(chunk)
+
+    coords = np.empty((matrix.shape[0], 2), dtype=np.float32)
+    for start, end in _chunks(matrix.shape[0], chunk_size):
+        coords[start:end] = pca.transform(np.asarray(matrix[start:end], dtype=np.float32))
+    return coords, "pca"
+
+def _phrases(text: str) -> List[str]:
+    tokens = tokenize(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+def extract_keyphrases(cluster_texts: dict, top_n: int = KEYPHRASES_PER_CLUSTER):
+    """
+    Class-based TF-IDF: phrases frequent in one cluster and rare in the
+    others. cluster_texts maps cluster -> list of texts.
+    """
+    counts = {c: Counter(p for t in texts for p in _phrases(t)) for c, texts in cluster_texts.items()}
+    totals = Counter()
+    for c_counts in counts.values():
+        totals.update(c_counts)
+
+    avg_words = sum(sum(c.values()) for c in counts.values()) / max(len(counts), 1)
+
+    keyphrases = {}
+    for c, c_counts in counts.items():
+        words = sum(c_counts.values()) or 1
+        scored = sorted(
+            ((tf / words * math.log(1 + avg_words / totals[p]), p) for p, tf in c_counts.items() if tf > 1),
+            reverse=True
+        )
+
+        chosen = []
+        for _score, phrase in scored:
+            parts = set(phrase.split())
+            # Phrases sharing a word are redundant; a bigram replaces the
+            # unigrams it contains ("dark matter" over "matter")
+            covered = [kept for kept in chosen if parts & set(kept.split())]
+            if covered:
+                if len(parts) > 1 and all(kept in parts for kept in covered):
+                    chosen = [kept for kept in chosen if kept not in covered] + [phrase]
+                continue
+            chosen.append(phrase)
+            if len(chosen) >= top_n:
+                break
+        keyphrases[c] = chosen
+
+    return keyphrases
+
+def build_concept_map(domain_code: str, n_clusters: int = CONCEPT_CLUSTERS, layout: str = CONCEPT_LAYOUT,
+                      chunk_size: int = 20000, out_dir: str = ARXIV_CONCEPT_DIR):
+    """
+    Cluster the domain's precomputed abstract embeddings (python
+    arxiv_embeddings.py), name clusters by keyphrase and store a 2D layout
+    in out_dir/<domain>/.
+    """
+    matrix = load_embedding_matrix(domain_code)
+    index = load_domain_index(domain_code)
+    if matrix is None or index is None or index.num_docs != matrix.shape[0]:
+        print(f"[concepts] {domain_code}: BM25 index and embeddings are required, skipping")
+        return
+
+    start = time.time()
+    num_docs = matrix.shape[0]
+    n_clusters = max(1, min(n_clusters, num_docs))
+
+    labels = _fit_clusters(matrix, n_clusters, chunk_size)
+    coords, layout = _fit_layout(matrix, layout, chunk_size)
+    print(f"[concepts] {domain_code}: clustered and projected {num_docs} abstracts ({time.time() - start:.0f}s)")
+
+    rng = np.random.default_rng(0)
+    cluster_texts = {}
+    for c in range(n_clusters):
+        members = np.flatnonzero(labels == c)
+        if not len(members):
+            continue
+        picked = np.sort(rng.choice(members, min(len(members), KEYPHRASE_DOCS_PER_CLUSTER), replace=False))
+        cluster_texts[c] = [f"{d['title']} {d['abstract']}" for d in index.get_docs(picked)]
+    keyphrases = extract_keyphrases(cluster_texts)
+
+    sample = np.sort(rng.choice(num_docs, min(num_docs, CONCEPT_SAMPLE_POINTS), replace=False))
+    sample_docs = index.get_docs(sample)
+
+    base = os.path.join(out_dir, domain_code)
+    os.makedirs(base, exist_ok=True)
+    np.save(os.path.join(base, "coords.npy"), coords)
+    np.save(os.path.join(base, "clusters.npy"), labels)
+    ids = np.array(list(index.iter_ids()), dtype="S")
+    order = np.argsort(ids, kind="stable")
+    np.save(os.path.join(base, "ids_sorted.npy"), ids[order])
+    np.save(os.path.join(base, "ids_order.npy"), order)
+
+    clusters = []
+    for c, phrases in keyphrases.items():
+        members = labels == c
+        clusters.append({
+            "cluster": int(c),
+            "size": int(members.sum()),
+            "keyphrases": phrases,
+            "x": float(coords[members, 0].mean()),
+            "y": float(coords[members, 1].mean()),
+        })
+
+    points = [
+        {"id": d["id"], "title": d["title"], "x": float(coords[i, 0]), "y": float(coords[i, 1]), "cluster": int(labels[i])}
+        for i, d in zip(sample, sample_docs)
+    ]
+
+    with open(os.path.join(base, "concepts.json"), "w", encoding="utf-8") as f:
+        json.dump({"num_docs": num_docs, "layout": layout, "clusters": clusters, "points": points}, f)
+
+    load_concept_map.cache_clear()
+    print(f"[concepts] {domain_code}: {len(clusters)} clusters saved to {base} ({time.time() - start:.0f}s)")
+
+# ============================================================
+# Query time
+# ============================================================
+
+def cited_arxiv_ids(text: str) -> List[str]:
+    """arXiv ids cited in an answer ([arXiv:XXXX.XXXXX] or abs links), in order"""
+    seen = []
+    for arxiv_id in _CITATION_RE.findall(text):
+        if arxiv_id not in seen:
+            seen.append(arxiv_id)
+    return seen
+
+class ConceptMap:
+    """
+    Precomputed 2D layout of one domain: a display sample, cluster labels,
+    and coordinates of every paper for highlighting.
+    """
+
+    def __init__(self, base: str):
+        with open(os.path.join(base, "concepts.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.layout = data["layout"]
+        self.clusters = data["clusters"]
+        self.points = data["points"]
+
+        self.coords = np.load(os.path.join(base, "coords.npy"), mmap_mode="r")
+        self.labels = np.load(os.path.join(base, "clusters.npy"), mmap_mode="r")
+
+        # arXiv ids sorted for binary search, and the row of each sorted id
+        sorted_path = os.path.join(base, "ids_sorted.npy")
+        if os.path.exists(sorted_path):
+            self.sorted_ids = np.load(sorted_path, mmap_mode="r")
+            self.id_rows = np.load(os.path.join(base, "ids_order.npy"), mmap_mode="r")
+        else:
+            # Maps built before the sorted id arrays existed
+            with open(os.path.join(base, "ids.txt"), "r", encoding="utf-8") as f:
+                ids = np.array([line.rstrip("\n") for line in f], dtype="S")
+            self.id_rows = np.argsort(ids, kind="stable")
+            self.sorted_ids = ids[self.id_rows]
+
+        self.cluster_names = {c["cluster"]: ", ".join(c["keyphrases"][:2]) for c in self.clusters}
+
+    def _row(self, arxiv_id: str):
+        key = arxiv_id.encode("utf-8")
+        if len(key) > self.sorted_ids.dtype.itemsize:
+            return None
+        pos = int(np.searchsorted(self.sorted_ids, key))
+        if pos == len(self.sorted_ids) or self.sorted_ids[pos] != key:
+            return None
+        return int(self.id_rows[pos])
+
+    def locate(self, arxiv_ids: List[str]):
+        """Coordinates and cluster of the given papers (unknown ids are skipped)"""
+        located = []
+        for arxiv_id in arxiv_ids:
+            row = self._row(arxiv_id)
+            if row is None:
+                continue
+            cluster = int(self.labels[row])
+            located.append({
+                "id": arxiv_id,
+                "x": float(self.coords[row, 0]),
+                "y": float(self.coords[row, 1]),
+                "cluster": cluster,
+                "topic": self.cluster_names.get(cluster, ""),
+            })
+        return located
+
+    def chart(self, highlight_ids: List[str] = ()):
+        """Altair chart: sampled papers by cluster, cluster labels, cited papers on top"""
+        import altair as alt
+        import pandas as pd
+
+        points = pd.DataFrame(self.points)
+        points["topic"] = points["cluster"].map(self.cluster_names)
+
+        base = alt.Chart(points).mark_circle(size=12, opacity=0.45).encode(
+            x=alt.X("x", axis=None),
+            y=alt.Y("y", axis=None),
+            color=alt.Color("topic:N", legend=None),
+            tooltip=["title", "id", "topic"]
+        )
+
+        labels = alt.Chart(pd.DataFrame([
+            {"x": c["x"], "y": c["y"], "label": self.cluster_names[c["cluster"]]} for c in self.clusters
+        ])).mark_text(fontSize=11, fontWeight="bold").encode(x="x", y="y", text="label")
+
+        layers = [base, labels]
+
+        cited = self.locate(list(highlight_ids))
+        if cited:
+            layers.append(alt.Chart(pd.DataFrame(cited)).mark_point(
+                size=160, shape="diamond", filled=True, color="red"
+            ).encode(x="x", y="y", tooltip=["id", "topic"]))
+
+        return alt.layer(*layers).properties(height=520).interactive()
+
+@lru_cache(maxsize=len(DOMAIN_CODES))
+def load_concept_map(domain_code: str, concept_dir: str = ARXIV_CONCEPT_DIR):
+    base = os.path.join(concept_dir, domain_code)
+    if not os.path.exists(os.path.join(base, "concepts.json")):
+        return None
+    return ConceptMap(base)
+
+if __name__ == "__main__":
+    # python concept_map.py [cs,astro-ph,...]
+    domains = sys.argv[1].split(",") if len(sys.argv) > 1 else DOMAIN_CODES
+    for d in domains:
+        build_concept_map(d)
@@ -1,5 +1,7 @@
 import os
 import json
+import time
+import threading
 import streamlit as st
 from dotenv import load_dotenv
 from typing import List, Dict
@@ -11,9 +13,19 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableLambda
 
-from sentence_transformers import SentenceTransformer, util, CrossEncoder
+from sentence_transformers import SentenceTransformer, util
 import re
 
+from arxiv_index import tokenize, search_candidates, paper_domains, load_domain_index
+from arxiv_embeddings import BI_ENCODER_NAME, load_embedding_store
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import numpy as np
+from arxiv_shards import has_shards, scan_candidates
+from reranker import cascade_rerank, load_cross_encoder, scored_fraction
+from retrieval_cache import RetrievalCache
+
 # ============================================================
 # Utility: Sentence splitting (NLTK-free, SSL-safe)
 # ============================================================
@@ -59,11 +71,19 @@ llm = ChatGoogleGenerativeAI(
 # ---------------------------
 # NLP Models (Query-time only)
 # ---------------------------
-bi_encoder = SentenceTransformer("all-mpnet-base-v2")
-cross_encoder = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+bi_encoder = SentenceTransformer(BI_ENCODER_NAME)
+load_cross_encoder()  # RERANK_BACKEND: torch / int8 / onnx
 
 ARXIV_JSON_PATH = "arxiv-metadata-oai-snapshot.json"
 
+# Dense (ANN) candidates added on top of the BM25 candidates
+DENSE_TOP_K = 100
+
+@lru_cache(maxsize=256)
+def encode_query(query: str):
+    """Normalized bi-encoder embedding of a query (numpy)"""
+    return bi_encoder.encode(query, normalize_embeddings=True)
+
 # ============================================================
 # 1. Stream arXiv candidates (NO full load)
 # ============================================================
@@ -74,13 +94,23 @@ def stream_arxiv_candidates(
     max_docs: int = 200
 ) -> List[Dict]:
 
+    # Columnar per-domain shard (python arxiv_shards.py): read only this domain
+    if has_shards(domain_code):
+        candidates = scan_candidates(domain_code, query_terms, max_docs)
+
+        if DEBUG:
+            print(f"[DEBUG] Shard candidates retrieved: {len(candidates)}")
+
+        return candidates
+
     candidates = []
 
     with open(ARXIV_JSON_PATH, "r") as f:
         for line in f:
             paper = json.loads(line)
 
-            if not paper.get("categories", "").startswith(domain_code):
+            # Includes cross-listed papers
+            if domain_code not in paper_domains(paper.get("categories", "")):
                 continue
 
             title = paper.get("title", "")
@@ -104,22 +134,52 @@ def stream_arxiv_candidates(
 
     return candidates
 
+def get_arxiv_candidates(domain_code: str, query: str, max_docs: int = 200) -> List[Dict]:
+    """
+    BM25 top-k from the prebuilt index (python arxiv_index.py);
+    falls back to scanning the snapshot when no index exists.
+    """
+    candidates = search_candidates(domain_code, query, max_docs)
+
+    if candidates is None:
+        return stream_arxiv_candidates(domain_code, tokenize(query), max_docs)
+
+    # Dense candidates straight from the precomputed ANN index (python arxiv_embeddings.py)
+    store = load_embedding_store(domain_code)
+    if store is not None:
+        seen = {c["doc_index"] for c in candidates}
+        dense_ids = [i for i, _ in store.search(encode_query(query), DENSE_TOP_K) if i not in seen]
+        candidates += load_domain_index(domain_code).get_docs(dense_ids)
+
+    if DEBUG:
+        print(f"[DEBUG] BM25 candidates retrieved: {len(candidates)}")
+        for c in candidates[:5]:
+            print({"id": c["id"], "title": c["title"][:120]})
+
+    return candidates
+
 # ============================================================
 # 2. Bi-Encoder Semantic Re-ranking (Fast)
 # ============================================================
 
-def rerank_with_bert(query: str, candidates: List[Dict], top_k: int = 10):
+def rerank_with_bert(query: str, candidates: List[Dict], top_k: int = 10, domain_code: str = None):
 
     if not candidates:
         return []
 
-    query_emb = bi_encoder.encode(query, convert_to_tensor=True)
-    doc_embs = bi_encoder.encode(
-        [c["abstract"] for c in candidates],
-        convert_to_tensor=True
-    )
+    store = load_embedding_store(domain_code) if domain_code else None
+
+    if store is not None and all("doc_index" in c for c in candidates):
+        # Abstract embeddings are precomputed; only the query is encoded
+        scores = store.scores(encode_query(query), [c["doc_index"] for c in candidates]).tolist()
+    else:
+        query_emb = bi_encoder.encode(query, convert_to_tensor=True)
+        doc_embs = bi_encoder.encode(
+            [c["abstract"] for c in candidates],
+            convert_to_tensor=True
+        )
 
-    scores = util.cos_sim(query_emb, doc_embs)[0]
+        scores = util.cos_sim(query_emb, doc_embs)[0]
 
     ranked = sorted(
         zip(candidates, scores),
@@ -143,16 +203,11 @@ def cross_encode_rerank(query: str, ranked_docs, top_k: int = 5):
     if not ranked_docs:
         return []
 
-    pairs = [(query, d[0]["abstract"]) for d in ranked_docs]
-    scores = cross_encoder.predict(pairs)
-
-    final = sorted(
-        zip(ranked_docs, scores),
-        key=lambda x: x[1],
-        reverse=True
-    )
+    # Scores in bi-encoder order, skipping documents that cannot reach the top_k
+    final = cascade_rerank(query, ranked_docs, top_k=top_k)
 
     if DEBUG:
+        print(f"[DEBUG] Cross-encoder scored fraction so far: {scored_fraction():.0%}")
         print("[DEBUG] Cross-encoder final ranking:")
         for ((doc, bert_score), ce_score) in final:
             print({
@@ -161,35 +216,88 @@ def cross_encode_rerank(query: str, ranked_docs, top_k: int = 5):
                 "title": doc["title"][:120]
             })
 
-    return final[:top_k]
+    return final
 
 # ============================================================
 # 4. Sentence-Level Information Extraction
 # ============================================================
 
-def extract_relevant_sentences(query: str, abstract: str, top_n: int = 3):
+# Sentence splits + embeddings per paper id, reused by follow-up questions
+SENTENCE_CACHE_SIZE = 512
+_sentence_cache = OrderedDict()
+_sentence_cache_lock = threading.Lock()
+
+def _paper_sentences(papers: List[Dict]):
+    """
+    Sentences and normalized sentence embeddings for each paper.
+    Papers not in the cache are encoded together in one batch.
+    """
+    results = [None] * len(papers)
+    missing = []
+
+    for i, paper in enumerate(papers):
+        cached = None
+        if paper.get("id"):
+            with _sentence_cache_lock:
+                cached = _sentence_cache.get(paper["id"])
+                if cached is not None:
+                    _sentence_cache.move_to_end(paper["id"])
+
+        if cached is not None:
+            results[i] = cached
+        else:
+            sentences = sentence_split(paper["abstract"]) if paper.get("abstract") else []
+            missing.append((i, [s for s in sentences if s]))
+
+    all_sentences = [s for _, sents in missing for s in sents]
+    if all_sentences:
+        all_embs = bi_encoder.encode(all_sentences, batch_size=64, normalize_embeddings=True)
+    else:
+        all_embs = np.zeros((0, bi_encoder.get_sentence_embedding_dimension()), dtype=np.float32)
 
-    if not abstract:
-        return []
+    start = 0
+    for i, sents in missing:
+        entry = (sents, all_embs[start:start + len(sents)])
+        start += len(sents)
+        results[i] = entry
 
-    sentences = sentence_split(abstract)
-    if not sentences:
-        return []
+        paper_id = papers[i].get("id")
+        if paper_id:
+            with _sentence_cache_lock:
+                _sentence_cache[paper_id] = entry
+                while len(_sentence_cache) > SENTENCE_CACHE_SIZE:
+                    _sentence_cache.popitem(last=False)
 
-    sent_embs = bi_encoder.encode(sentences, convert_to_tensor=True)
-    query_emb = bi_encoder.encode(query, convert_to_tensor=True)
+    return results
 
-    scores = util.cos_sim(query_emb, sent_embs)[0]
-    top_idx = scores.argsort(descending=True)[:top_n]
+def extract_relevant_sentences_batch(query: str, papers: List[Dict], top_n: int = 3) -> List[List[str]]:
+    """
+    Top sentences of every paper for the query, with the query encoded once
+    and all uncached sentences encoded in a single batch.
+    """
+    query_emb = encode_query(query)
+    selected_per_paper = []
 
-    selected = [sentences[i] for i in top_idx]
+    for sentences, sent_embs in _paper_sentences(papers):
+        if not sentences:
+            selected_per_paper.append([])
+            continue
 
-    if DEBUG:
-        print("[DEBUG] Extracted sentences:")
-        for s in selected:
-            print(f"- {s}")
+        scores = sent_embs @ query_emb
+        top_idx = np.argsort(-scores)[:top_n]
+        selected = [sentences[i] for i in top_idx]
+
+        if DEBUG:
+            print("[DEBUG] Extracted sentences:")
+            for s in selected:
+                print(f"- {s}")
+
+        selected_per_paper.append(selected)
 
-    return selected
+    return selected_per_paper
+
+def extract_relevant_sentences(query: str, abstract: str, top_n: int = 3):
+    return extract_relevant_sentences_batch(query, [{"abstract": abstract}], top_n)[0]
 
 # ============================================================
 # 5. Build High-Signal LLM Context
@@ -199,8 +307,10 @@ def build_llm_context(query: str, top_papers) -> str:
 
     context_blocks = []
 
-    for (paper, _bert_score), _ce_score in top_papers:
-        key_sents = extract_relevant_sentences(query, paper["abstract"])
+    papers = [paper for (paper, _bert_score), _ce_score in top_papers]
+    all_key_sents = extract_relevant_sentences_batch(query, papers)
+
+    for paper, key_sents in zip(papers, all_key_sents):
 
         block = f"""
             Paper: {paper['title']}
@@ -230,6 +340,38 @@ Follow-up Question:
 Standalone Question:
 """)
 
+# Referring expressions that point back to earlier turns: third-person
+# pronouns, a demonstrative opening a clause ("This works how?") or
+# determining a noun ("that method"), "the previous/above ..." and
+# continuation openers ("what about ..."). Everyday words such as "one",
+# "more" or "other" are left out, they appear in standalone questions
+_REFERENT_NOUNS = (
+    r"(?:paper|papers|method|methods|approach|approaches|model|models|result|results|"
+    r"work|study|studies|technique|idea|answer|one|ones)\b"
+)
+_ANAPHORA_RE = re.compile(
+    r"\b(?:it|its|they|them|their|theirs|those|he|she|him|his|her)\b"
+    r"|(?:^|[.;:!?,]\s*)(?:this|that|these)\b"
+    r"|\b(?:this|that|these|the\s+(?:first|second|third|last))\s+" + _REFERENT_NOUNS +
+    r"|\bthe\s+(?:previous|above|former|latter|earlier|same)\b(?!-)"
+    r"|^\s*(?:and|but|so|then|what about|how about)\b",
+    re.IGNORECASE
+)
+
+# Questions with fewer content terms than this ("why?", "any examples?") lean on history
+FOLLOW_UP_MIN_TERMS = 3
+
+def needs_condensation(question: str, chat_history) -> bool:
+    """
+    Whether the question depends on the chat history and must be
+    rewritten before retrieval. Errs on the side of condensing.
+    """
+    if not chat_history:
+        return False
+    if _ANAPHORA_RE.search(question):
+        return True
+    return len(tokenize(question)) < FOLLOW_UP_MIN_TERMS
+
 def condense_question(llm, chat_history, question):
     history_text = "\n".join(
         [f"{role}: {msg}" for role, msg in chat_history]
@@ -283,28 +425,135 @@ def update_conversation_summary(
         "assistant": assistant_msg
     })
 
+# Summary updates run after the answer is shown; one worker keeps them in order
+_summary_executor = ThreadPoolExecutor(max_workers=1)
+
+def update_conversation_summary_async(existing_summary: str, user_msg: str, assistant_msg: str, previous=None):
+    """
+    Update the summary in the background and return a Future of the new one.
+    `previous` is a still-running update (Future); its result is used as the
+    existing summary once it finishes.
+    """
+    def _run():
+        summary = existing_summary
+        if previous is not None:
+            try:
+                summary = previous.result()
+            except Exception as e:
+                print(f"Previous summary update failed: {e}")
+        return update_conversation_summary(summary, user_msg, assistant_msg)
+
+    return _summary_executor.submit(_run)
+
 # ============================================================
 # 8. End-to-End Query → Context → LLM
 # ============================================================
 
-def answer_query(query: str, domain_code: str, chat_history: List[tuple] = None, conversation_summary: str = "") -> str:
-
-    if chat_history:
+# Retrieval on the raw query runs while the question is being condensed;
+# its results are kept when the condensed query embeds close to the raw one
+SPECULATION_MIN_COSINE = float(os.getenv("SPECULATION_MIN_COSINE", "0.9"))
+
+_retrieval_executor = ThreadPoolExecutor(max_workers=2)
+_speculation_lock = threading.Lock()
+speculation_stats = {"speculated": 0, "accepted": 0, "rejected": 0, "rejected_s": 0.0}
+
+# Final rankings of recent (domain, query) pairs; repeats skip the retrieval stack
+retrieval_cache = RetrievalCache()
+
+def retrieve_ranked(query: str, domain_code: str, cancel_event=None):
+    """
+    Candidates → bi-encoder → cross-encoder for one query.
+    Returns None when cancel_event is set before a stage starts.
+    """
+    query_emb = encode_query(query)
+
+    cached = retrieval_cache.get(domain_code, query, query_emb)
+    if cached is not None:
+        if DEBUG:
+            print(f"[DEBUG] Retrieval cache hit (hit rate {retrieval_cache.hit_rate():.0%})")
+        return cached
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    if cancelled():
+        return None
+    candidates = get_arxiv_candidates(domain_code, query)
+
+    if cancelled():
+        return None
+    bert_ranked = rerank_with_bert(query, candidates, domain_code=domain_code)
+
+    if cancelled():
+        return None
+    final_ranked = cross_encode_rerank(query, bert_ranked)
+
+    if final_ranked:
+        retrieval_cache.put(domain_code, query, final_ranked, query_emb)
+
+    return final_ranked
+
+def _speculate(query: str, domain_code: str, cancel_event):
+    """retrieve_ranked plus the time it ran, so rejected work can be accounted"""
+    start = time.perf_counter()
+    ranked = retrieve_ranked(query, domain_code, cancel_event)
+    return ranked, time.perf_counter() - start
+
+def _record_rejected_cost(future):
+    seconds = 0.0 if future.cancelled() or future.exception() else future.result()[1]
+    with _speculation_lock:
+        speculation_stats["rejected_s"] += seconds
+    print(f"Rejected speculative retrieval ran {seconds:.2f}s "
+          f"({speculation_stats['rejected_s']:.1f}s over {speculation_stats['rejected']} rejections)")
+
+def _record_speculation(accepted: bool):
+    with _speculation_lock:
+        speculation_stats["speculated"] += 1
+        speculation_stats["accepted" if accepted else "rejected"] += 1
+
+def speculation_acceptance_rate() -> float:
+    if not speculation_stats["speculated"]:
+        return 0.0
+    return speculation_stats["accepted"] / speculation_stats["speculated"]
+
+def stream_answer_query(query: str, domain_code: str, chat_history: List[tuple] = None, conversation_summary: str = ""):
+    """
+    Retrieve, rerank and build the context, then yield the answer
+    token by token as the LLM produces it.
+    """
+
+    if needs_condensation(query, chat_history):
+        cancel_speculation = threading.Event()
+        speculative = _retrieval_executor.submit(_speculate, query, domain_code, cancel_speculation)
         condensed_query = condense_question(llm, chat_history, query)
+
+        similarity = float(encode_query(query) @ encode_query(condensed_query))
+        accepted = similarity >= SPECULATION_MIN_COSINE
+        _record_speculation(accepted)
+
+        if DEBUG:
+            print(f"[DEBUG] Speculative retrieval {'accepted' if accepted else 'rejected'} "
+                  f"(cosine {similarity:.3f}, acceptance rate {speculation_acceptance_rate():.0%})")
+
+        if accepted:
+            final_ranked, _ = speculative.result()
+        else:
+            # Stop the speculative work at its next stage so it does not
+            # compete with the real retrieval
+            cancel_speculation.set()
+            speculative.cancel()
+            speculative.add_done_callback(_record_rejected_cost)
+            final_ranked = retrieve_ranked(condensed_query, domain_code)
     else:
         condensed_query = query
+        final_ranked = retrieve_ranked(query, domain_code)
 
     if DEBUG:
         print("[DEBUG] Condensed Query:", condensed_query)
 
-    query_terms = condensed_query.lower().split()
-
-    candidates = stream_arxiv_candidates(domain_code, query_terms)
-    bert_ranked = rerank_with_bert(condensed_query, candidates)
-    final_ranked = cross_encode_rerank(condensed_query, bert_ranked)
-
     if not final_ranked:
-        return "I don't know."
+        yield "I don't know."
+        return
 
     context = build_llm_context(condensed_query, final_ranked)
 
@@ -351,19 +600,26 @@ def answer_query(query: str, domain_code: str, chat_history: List[tuple] = None,
 
     chain = prompt | llm | StrOutputParser()
 
-    return chain.invoke({
+    yield from chain.stream({
         "context": context,
         "question": query,
         "domain": DOMAIN_CODE_TO_NAME.get(domain_code),
         "summary": conversation_summary
     })
 
+def answer_query(query: str, domain_code: str, chat_history: List[tuple] = None, conversation_summary: str = "") -> str:
+    return "".join(stream_answer_query(query, domain_code, chat_history, conversation_summary))
+
 # ============================================================
 # Chain Wrapper (Streamlit-friendly)
 # ============================================================
 
 def get_query_chain(domain_code: str, chat_history: List[tuple], conversation_summary: str):
-    return RunnableLambda(lambda query: answer_query(query, domain_code, chat_history, conversation_summary))
+    # A generator function makes the chain streamable: .stream() yields tokens, .invoke() the full answer
+    def _answer(query):
+        yield from stream_answer_query(query, domain_code, chat_history, conversation_summary)
+
+    return RunnableLambda(_answer)
 
 
 # chain = get_query_chain("cond-mat")
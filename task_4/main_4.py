@@ -1,5 +1,7 @@
+import time
 import streamlit as st
-from helper import get_query_chain, update_conversation_summary
+from helper import get_query_chain, update_conversation_summary_async
+from concept_map import load_concept_map, cited_arxiv_ids
 
 st.set_page_config(page_title="arXiv Expert Chatbot", layout="wide")
 st.title("📚 arXiv Domain Expert Chatbot")
@@ -48,20 +50,52 @@ if "conversation_summary" not in st.session_state:
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
+if "summary_future" not in st.session_state:
+    st.session_state.summary_future = None
+
+# Merge a background summary update that finished since the last run
+summary_future = st.session_state.summary_future
+if summary_future is not None and summary_future.done():
+    try:
+        st.session_state.conversation_summary = summary_future.result()
+    except Exception as e:
+        print(f"Conversation summary update failed: {e}")
+    st.session_state.summary_future = None
+
 query = st.text_input("Ask a research-level question")
 
 if query:
+    # Live turn while tokens arrive; replaced by the history below once complete
+    live_turn = st.empty()
+    with live_turn.container():
+        st.markdown(f"**🧑 User:** {query}")
+        answer_placeholder = st.empty()
+    response = ""
+    first_token_s = None
+
     with st.spinner("Searching arXiv & reasoning..."):
         chain = get_query_chain(domain_code, st.session_state.chat_history, st.session_state.conversation_summary)
-        response = chain.invoke(query)
+
+        start = time.perf_counter()
+        for chunk in chain.stream(query):
+            if first_token_s is None:
+                first_token_s = time.perf_counter() - start
+            response += chunk
+            answer_placeholder.markdown(f"**🤖 Assistant:** {response}")
+
+    live_turn.empty()
+    print(f"Time to first token: {first_token_s or 0:.2f}s")
+    st.metric("Time to first token", f"{first_token_s or 0:.2f}s")
 
     # rag = get_qa_chain(domain_code, st.session_state.chat_history)
     # response = rag.invoke(query)
 
-    st.session_state.conversation_summary = update_conversation_summary(
+    # Off the critical path: merged into session state on a later run
+    st.session_state.summary_future = update_conversation_summary_async(
         st.session_state.conversation_summary,
         query,
-        response
+        response,
+        previous=st.session_state.summary_future
     )
 
     st.session_state.chat_history.append((query, response))
@@ -77,3 +111,18 @@ for user, bot in st.session_state.chat_history:
     st.markdown(f"**🧑 User:** {user}")
     st.markdown(f"**🤖 Assistant:** {bot}")
     st.markdown("---")
+
+# ---------------------------
+# Concept Map (precomputed: python concept_map.py)
+# ---------------------------
+concept_map = load_concept_map(domain_code)
+
+if concept_map is not None:
+    with st.expander("🗺️ Concept Map", expanded=bool(st.session_state.chat_history)):
+        cited = cited_arxiv_ids(st.session_state.chat_history[-1][1]) if st.session_state.chat_history else []
+        st.altair_chart(concept_map.chart(cited), use_container_width=True)
+
+        located = concept_map.locate(cited)
+        if located:
+            st.caption("Cited papers (red): " + "; ".join(f"arXiv:{p['id']} — {p['topic']}" for p in located))
+
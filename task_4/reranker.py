@@ -0,0 +1,118 @@
+import os
+import threading
+from functools import lru_cache
+
+CROSS_ENCODER_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# "torch" (default), "int8" (dynamic int8 quantization) or "onnx" (ONNX Runtime via optimum)
+RERANK_BACKEND = os.getenv("RERANK_BACKEND", "torch").lower()
+
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+
+# Query + abstract tokens fed to the cross-encoder; longer abstracts are cut
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "256"))
+
+# Cascade: after the first top_k documents, score RERANK_CASCADE_STEP more at a
+# time and stop once the next bi-encoder score is RERANK_CASCADE_MARGIN below
+# every document currently in the cross-encoder top_k. A negative margin
+# disables the early exit.
+RERANK_CASCADE_STEP = 4
+RERANK_CASCADE_MARGIN = float(os.getenv("RERANK_CASCADE_MARGIN", "0.1"))
+
+_stats_lock = threading.Lock()
+rerank_stats = {"calls": 0, "candidates": 0, "scored": 0}
+
+@lru_cache(maxsize=3)
+def load_cross_encoder(backend: str = RERANK_BACKEND):
+    """
+    Return (tokenizer, model) of the MS MARCO cross-encoder for the backend.
+    """
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    tokenizer = AutoTokenizer.from_pretrained(CROSS_ENCODER_NAME)
+
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+            model = ORTModelForSequenceClassification.from_pretrained(CROSS_ENCODER_NAME, export=True)
+            return tokenizer, model
+        except ImportError:
+            print("optimum[onnxruntime] is not installed, falling back to the PyTorch cross-encoder")
+
+    import torch
+    model = AutoModelForSequenceClassification.from_pretrained(CROSS_ENCODER_NAME)
+    model.eval()
+
+    if backend == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    return tokenizer, model
+
+def score_pairs(query: str, abstracts, backend: str = RERANK_BACKEND,
+                batch_size: int = RERANK_BATCH_SIZE, max_length: int = RERANK_MAX_LENGTH):
+    """
+    Cross-encoder relevance logits of (query, abstract) pairs.
+    Only the abstract is truncated, so the query is always seen in full.
+    """
+    import torch
+
+    tokenizer, model = load_cross_encoder(backend)
+    scores = []
+
+    for start in range(0, len(abstracts), batch_size):
+        batch = abstracts[start:start + batch_size]
+        features = tokenizer(
+            [query] * len(batch), batch,
+            truncation="only_second", max_length=max_length,
+            padding=True, return_tensors="pt"
+        )
+        with torch.no_grad():
+            logits = model(**features).logits
+        scores.extend(logits[:, 0].float().tolist())
+
+    return scores
+
+def cascade_rerank(query: str, ranked_docs, top_k: int = 5, backend: str = RERANK_BACKEND,
+                   margin: float = RERANK_CASCADE_MARGIN, step: int = RERANK_CASCADE_STEP):
+    """
+    Cross-encoder rerank of bi-encoder results [(doc, bert_score), ...],
+    highest bert_score first. Documents are scored in bi-encoder order.
+    Scoring stops early once the next bi-encoder score is more than margin
+    below the weakest bi-encoder score in the current cross-encoder top_k.
+    This is a heuristic: a skipped document could still have made the top_k.
+    Returns [((doc, bert_score), ce_score), ...] for the top_k.
+    """
+    if not ranked_docs:
+        return []
+
+    scored = []
+    position = 0
+
+    while position < len(ranked_docs):
+        size = top_k if position == 0 else step
+        chunk = ranked_docs[position:position + size]
+        scores = score_pairs(query, [d[0]["abstract"] for d in chunk], backend=backend)
+        scored.extend(zip(chunk, scores))
+        position += len(chunk)
+
+        if margin < 0 or position >= len(ranked_docs) or len(scored) < top_k:
+            continue
+
+        current_top = sorted(scored, key=lambda x: x[1], reverse=True)[:top_k]
+        weakest_bert = min(float(bert_score) for (_doc, bert_score), _ce in current_top)
+        if float(ranked_docs[position][1]) < weakest_bert - margin:
+            break
+
+    with _stats_lock:
+        rerank_stats["calls"] += 1
+        rerank_stats["candidates"] += len(ranked_docs)
+        rerank_stats["scored"] += len(scored)
+
+    final = sorted(scored, key=lambda x: x[1], reverse=True)
+    return final[:top_k]
+
+def scored_fraction() -> float:
+    """Share of bi-encoder survivors that actually went through the cross-encoder"""
+    if not rerank_stats["candidates"]:
+        return 1.0
+    return rerank_stats["scored"] / rerank_stats["candidates"]
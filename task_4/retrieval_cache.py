@@ -0,0 +1,95 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "256"))
+RETRIEVAL_CACHE_TTL_S = float(os.getenv("RETRIEVAL_CACHE_TTL_S", "3600"))
+
+# Minimum cosine between (normalized) query embeddings for a semantic hit
+RETRIEVAL_CACHE_MIN_COSINE = float(os.getenv("RETRIEVAL_CACHE_MIN_COSINE", "0.97"))
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = re.sub(r"[^\w\s-]", " ", text.lower())
+    return " ".join(text.split())
+
+
+class RetrievalCache:
+    """
+    Final ranked paper lists keyed by (domain_code, normalized query).
+
+    1. Exact key lookup
+    2. Nearest cached query of the same domain by embedding, accepted only
+       above min_cosine
+    Entries expire after ttl_s; the least recently used go first when full.
+    """
+
+    def __init__(self, max_entries: int = RETRIEVAL_CACHE_SIZE, ttl_s: float = RETRIEVAL_CACHE_TTL_S,
+                 min_cosine: float = RETRIEVAL_CACHE_MIN_COSINE):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.min_cosine = min_cosine
+
+        self._entries = OrderedDict()  # key -> (expires_at, query_emb, ranked)
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "exact_hits": 0, "semantic_hits": 0}
+
+    def get(self, domain_code: str, query: str, query_emb=None):
+        key = (domain_code, normalize_query(query))
+        now = time.monotonic()
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            self._expire(now)
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return entry[2]
+
+            if query_emb is None:
+                return None
+
+            same_domain = [(k, e) for k, e in self._entries.items() if k[0] == domain_code and e[1] is not None]
+            if not same_domain:
+                return None
+
+            sims = np.stack([e[1] for _, e in same_domain]) @ np.asarray(query_emb, dtype=np.float32)
+            best = int(np.argmax(sims))
+            if sims[best] < self.min_cosine:
+                return None
+
+            best_key, best_entry = same_domain[best]
+            self._entries.move_to_end(best_key)
+            self.stats["semantic_hits"] += 1
+            return best_entry[2]
+
+    def put(self, domain_code: str, query: str, ranked, query_emb=None):
+        key = (domain_code, normalize_query(query))
+        emb = None if query_emb is None else np.asarray(query_emb, dtype=np.float32)
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, emb, ranked)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _expire(self, now):
+        expired = [k for k, (expires_at, _, _) in self._entries.items() if expires_at <= now]
+        for k in expired:
+            del self._entries[k]
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["lookups"]
+        if not lookups:
+            return 0.0
+        return (self.stats["exact_hits"] + self.stats["semantic_hits"]) / lookups
@@ -1,13 +1,13 @@
-ANXIETY_KEYWORDS = [
-    "worried", "scared", "afraid", "anxious", "panic",
-    "serious", "emergency", "life threatening",
-    "pain", "bleeding", "cancer", "tumor", "heart attack"
-]
+from anxiety_lexicon import ANXIETY_LEXICONS, get_anxiety_matcher
 
-def detect_medical_anxiety(text: str, sentiment_data: dict) -> bool:
-    text_lower = text.lower()
+ANXIETY_KEYWORDS = list(ANXIETY_LEXICONS["en"])
 
-    keyword_match = any(word in text_lower for word in ANXIETY_KEYWORDS)
+# Sum of (non-negated) lexicon weights needed for a keyword signal
+ANXIETY_MIN_SCORE = 1.0
+
+def detect_medical_anxiety(text: str, sentiment_data: dict, language: str = "en") -> bool:
+    # Whole-word, weighted lexicon match; negated terms ("not worried") don't count
+    keyword_match = get_anxiety_matcher(language).score(text) >= ANXIETY_MIN_SCORE
     negative_sentiment = sentiment_data["label"].lower() == "negative"
     high_confidence = sentiment_data["scores"][sentiment_data["label"].lower()] >= 0.65
 
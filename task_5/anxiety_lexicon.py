@@ -0,0 +1,146 @@
+import os
+import re
+import csv
+from functools import lru_cache
+
+# Optional curated lexicon: TSV rows of language, term, weight (added to / overriding the defaults)
+ANXIETY_LEXICON_PATH = os.getenv("ANXIETY_LEXICON_PATH")
+
+# A negator covers at most this many following words, within one clause
+NEGATION_WINDOW = 3
+
+# language -> {term or phrase: weight}; every built-in term triggers on its own,
+# curated lexicons can add weaker terms that only count together
+ANXIETY_LEXICONS = {
+    "en": {
+        "worried": 1.0, "scared": 1.0, "afraid": 1.0, "anxious": 1.0, "panic": 1.0,
+        "serious": 1.0, "emergency": 1.0, "life threatening": 1.5,
+        "pain": 1.0, "bleeding": 1.0, "cancer": 1.0, "tumor": 1.0, "heart attack": 1.5,
+    },
+    "es": {
+        "preocupado": 1.0, "preocupada": 1.0, "asustado": 1.0, "asustada": 1.0, "miedo": 1.0,
+        "ansioso": 1.0, "ansiosa": 1.0, "pánico": 1.0, "grave": 1.0, "emergencia": 1.0,
+        "dolor": 1.0, "sangrado": 1.0, "cáncer": 1.0, "tumor": 1.0, "ataque al corazón": 1.5,
+    },
+    "fr": {
+        "inquiet": 1.0, "inquiète": 1.0, "peur": 1.0, "effrayé": 1.0, "anxieux": 1.0,
+        "anxieuse": 1.0, "panique": 1.0, "grave": 1.0, "urgence": 1.0, "douleur": 1.0,
+        "saignement": 1.0, "cancer": 1.0, "tumeur": 1.0, "crise cardiaque": 1.5,
+    },
+}
+
+NEGATORS = {
+    "en": ["not", "no", "never", "without", "don't", "doesn't", "isn't", "aren't", "wasn't", "not really"],
+    "es": ["no", "nunca", "sin", "tampoco"],
+    "fr": ["ne", "pas", "jamais", "sans"],
+}
+
+_WORD_RE = re.compile(r"\w+(?:'\w+)?")
+# Negation ends at punctuation and contrastive conjunctions ("No, the pain
+# is bad"), and does not reach past "for"/"against" ("no cure for cancer")
+_SCOPE_BREAK_RE = re.compile(
+    r"[.,:;!?]|\b(?:but|for|against|pero|para|contra|mais|pour|contre)\b",
+    re.IGNORECASE
+)
+
+def _normalize_term(term: str) -> str:
+    return " ".join(term.lower().replace("-", " ").split())
+
+def _trie_regex(terms) -> str:
+    """
+    One regex for all terms, factored as a character trie so the engine
+    follows shared prefixes once instead of trying every term in turn.
+    Longer terms win over their prefixes ("heart attack" over "heart");
+    a space also matches hyphens ("life-threatening").
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        alternatives = [
+            (r"[\s-]+" if ch == " " else re.escape(ch)) + build(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        if "" in node:
+            body = ("(?:" + body + ")?") if len(alternatives) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+class LexiconMatcher:
+    """
+    Compiled weighted lexicon for one language. Terms and negators are
+    matched together in a single left-to-right pass with word boundaries,
+    so "pain" does not match "painting" and cost does not grow with the
+    number of terms scanned.
+    """
+
+    def __init__(self, weights: dict, negators=(), negation_window: int = NEGATION_WINDOW):
+        self.weights = {_normalize_term(t): w for t, w in weights.items()}
+        self.negation_window = negation_window
+
+        alternatives = [f"(?P<term>{_trie_regex(self.weights)})"]
+        if negators:
+            alternatives.append(f"(?P<neg>{_trie_regex([n.lower() for n in negators])})")
+
+        self.pattern = re.compile(r"(?<!\w)(?:" + "|".join(alternatives) + r")(?!\w)", re.IGNORECASE)
+
+    def matches(self, text: str):
+        """[(term, weight, start, end, negated), ...] in text order"""
+        text = text.replace("’", "'")
+        found = []
+        last_negator_end = None
+
+        for m in self.pattern.finditer(text):
+            if m.group("term") is None:
+                last_negator_end = m.end()
+                continue
+
+            term = _normalize_term(m.group("term"))
+            negated = False
+            if last_negator_end is not None:
+                gap = text[last_negator_end:m.start()]
+                negated = (
+                    not _SCOPE_BREAK_RE.search(gap)
+                    and len(_WORD_RE.findall(gap)) < self.negation_window
+                )
+
+            found.append((term, self.weights[term], m.start(), m.end(), negated))
+
+        return found
+
+    def score(self, text: str) -> float:
+        """Sum of weights of the non-negated terms"""
+        return sum(weight for _, weight, _, _, negated in self.matches(text) if not negated)
+
+
+@lru_cache(maxsize=1)
+def _load_extra_terms(path: str):
+    extra = {}
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.reader(f, delimiter="\t"):
+            if len(row) < 3 or row[0].startswith("#"):
+                continue
+            language, term, weight = row[0].strip(), row[1].strip(), float(row[2])
+            extra.setdefault(language, {})[term] = weight
+    return extra
+
+@lru_cache(maxsize=None)
+def get_anxiety_matcher(language: str = "en") -> LexiconMatcher:
+    """Compiled matcher for the language (English for unsupported languages)"""
+    extra = _load_extra_terms(ANXIETY_LEXICON_PATH) if ANXIETY_LEXICON_PATH else {}
+    if language not in ANXIETY_LEXICONS and language not in extra:
+        language = "en"
+
+    weights = dict(ANXIETY_LEXICONS.get(language, {}))
+    weights.update(extra.get(language, {}))
+
+    return LexiconMatcher(weights, NEGATORS.get(language, ()))
@@ -0,0 +1,56 @@
+import csv
+import os
+import sys
+import time
+import json
+
+from sentiment_analyzer import get_transformer_analyzer
+from sentiment_lexicon import LexiconSentiment
+
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+def load_questions(path: str, limit: int = 500):
+    questions = []
+    with open(path, "r", newline="", encoding="latin-1") as f:
+        for row in csv.DictReader(f):
+            questions.append(row["prompt"])
+            if len(questions) >= limit:
+                break
+    return questions
+
+def benchmark(texts):
+    """
+    Fast lexicon stage vs. the transformer on the same texts: share decided
+    by the fast path, its agreement with the transformer, and latency.
+    """
+    fast_stage = LexiconSentiment()
+    transformer = get_transformer_analyzer()
+    transformer.analyze_many(texts[:2])  # warm-up
+
+    start = time.perf_counter()
+    fast = [fast_stage.predict(t) for t in texts]
+    fast_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = transformer.analyze_many(texts)
+    transformer_s = time.perf_counter() - start
+
+    decided = [(f, r) for f, r in zip(fast, reference) if f is not None]
+    deferred = len(texts) - len(decided)
+
+    results = {
+        "texts": len(texts),
+        "fast_path_fraction": round(len(decided) / len(texts), 4),
+        "fast_path_agreement": round(sum(f["label"] == r["label"] for f, r in decided) / len(decided), 4) if decided else None,
+        "fast_us_per_text": round(1e6 * fast_s / len(texts), 2),
+        "transformer_ms_per_text": round(1000 * transformer_s / len(texts), 2),
+        # Cascade cost: every text through the fast stage, the deferred ones through the transformer
+        "cascade_ms_per_text_est": round((1000 * fast_s + 1000 * transformer_s * deferred / len(texts)) / len(texts), 3),
+    }
+    return results
+
+if __name__ == "__main__":
+    # python benchmark_sentiment.py [csv_path] [limit]
+    path = sys.argv[1] if len(sys.argv) > 1 else os.getenv("dataset_file")
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    print(json.dumps(benchmark(load_questions(path, limit)), indent=2))
@@ -9,8 +9,14 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableMap, RunnablePassthrough, RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
 import os
+import sys
 import traceback
 
+# Modules shared with the other apps (answer_store) live in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_store import index_content_columns, mark_question_documents, build_answer_store, attach_answers
+
 load_dotenv()  # take environment variables from .env (especially openai api key)
 
 # Load API Key from .env
@@ -41,10 +47,11 @@ def create_vector_store():
         loader = CSVLoader(
             file_path=dataset_path,
             source_column="prompt",   # column to extract data from
+            content_columns=index_content_columns(),  # question-only by default, see answer_store.py
             encoding="latin-1"
         )
 
-        data = loader.load()
+        data = mark_question_documents(loader.load())
 
         print("Step 2: Loaded", len(data), "documents")
 
@@ -56,6 +63,9 @@ def create_vector_store():
         # Save vector database locally
         vectordb.save_local(vectordb_file_path)
 
+        # Answers are looked up by row id for the top-k hits only
+        build_answer_store(dataset_path, vectordb_file_path)
+
         print("Vector database created and saved at: ", vectordb_file_path)
     except Exception as e:
         print("ERROR OCCURRED:")
@@ -68,7 +78,9 @@ def retrieve_context(sentiment, anxiety_flag):
 
     vectordb = FAISS.load_local(vectordb_file_path, instructor_embeddings, allow_dangerous_deserialization=True)
 
-    retriever = vectordb.as_retriever(score_threshold=0.8)
+    retriever = vectordb.as_retriever(score_threshold=0.8) | RunnableLambda(
+        lambda docs: attach_answers(docs, vectordb_file_path)
+    )
 
     rag = build_rag_chain(retriever, sentiment, anxiety_flag)
 
@@ -1,9 +1,10 @@
 import streamlit as st
 from helper import create_vector_store, retrieve_context
-from sentiment_analyzer import MedicalSentimentAnalyzer
+from sentiment_analyzer import get_sentiment_analyzer
 from anxiety_detector import detect_medical_anxiety
 from datetime import datetime
 import json
+import time
 from pathlib import Path
 
 st.set_page_config(page_title="Sentiment-Medical Q&A Chatbot")
@@ -22,7 +23,7 @@ folder_path = Path("vector_db_store")
 if folder_path.exists() and folder_path.is_dir():
     st.session_state.db_ready = True
 
-sentiment_analyzer = MedicalSentimentAnalyzer()
+sentiment_analyzer = get_sentiment_analyzer()
 
 btn = st.button("Create Knowledgebase")
 if btn:
@@ -73,12 +74,23 @@ if st.button("Ask") and question:
         st.error("Please create the knowledge base first.")
         st.stop()
         
+    # Live answer while tokens arrive; replaced by the chat history once complete
+    answer_placeholder = st.empty()
+
     with st.spinner("Analyzing your question..."):
 
         # 1. Sentiment detection
         sentiment_data = sentiment_analyzer.analyze(question)
         sentiment = sentiment_data['label']
 
+        if hasattr(sentiment_analyzer, "fast_path_fraction"):
+            agreement = sentiment_analyzer.agreement()
+            st.caption(
+                f"Sentiment stage: {sentiment_data['stage']} | "
+                f"fast path {sentiment_analyzer.fast_path_fraction():.0%} of messages"
+                + (f", {agreement:.0%} agreement with the transformer" if agreement is not None else "")
+            )
+
         # sentiment_data = detect_sentiment(question)
         # render_sentiment(sentiment_data)
 
@@ -106,7 +118,18 @@ if st.button("Ask") and question:
         question_to_ask = previous_answer + ". " + question
 
         print(question_to_ask)
-        response = rag.invoke(question_to_ask)
+
+        response = ""
+        first_token_s = None
+        start = time.perf_counter()
+        for chunk in rag.stream(question_to_ask):
+            if first_token_s is None:
+                first_token_s = time.perf_counter() - start
+            response += chunk
+            answer_placeholder.markdown(f"Bot: {response}")
+
+        answer_placeholder.empty()
+        print(f"Time to first token: {first_token_s or 0:.2f}s")
 
         # 5. Store interaction
         st.session_state.chat_history.append({
@@ -124,6 +147,8 @@ if st.button("Ask") and question:
             ensure_ascii=False
         )
 
+    st.metric("Time to first token", f"{first_token_s or 0:.2f}s")
+
     # st.metric(
     #     label="Emotional State",
     #     value=sentiment_data["label"],
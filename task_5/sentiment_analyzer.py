@@ -1,6 +1,20 @@
 from transformers import pipeline
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from sentiment_lexicon import LexiconSentiment
+import os
+import random
+import threading
 import torch
 
+SENTIMENT_BATCH_SIZE = 32
+
+# Fast lexicon stage in front of the transformer ("0" disables it)
+SENTIMENT_CASCADE = os.getenv("SENTIMENT_CASCADE", "1") != "0"
+
+# Share of fast-path decisions re-checked by the transformer in the background
+SENTIMENT_AUDIT_RATE = float(os.getenv("SENTIMENT_AUDIT_RATE", "0.1"))
+
 class MedicalSentimentAnalyzer:
     def __init__(self):
         self.sentiment_pipeline = pipeline(
@@ -10,13 +24,15 @@ class MedicalSentimentAnalyzer:
             return_all_scores=True
         )
 
+        # The pipeline is shared by Streamlit sessions and the audit thread,
+        # and is not safe to call concurrently
+        self._pipeline_lock = threading.Lock()
+
         # Thresholds tuned for medical text
         self.NEG_THRESHOLD = 0.55
         self.POS_THRESHOLD = 0.55
 
-    def analyze(self, text: str) -> dict:
-        scores = self.sentiment_pipeline(text)[0]
-
+    def _decide(self, scores) -> dict:
         score_map = {s["label"].upper(): s["score"] for s in scores}
 
         positive = score_map.get("POSITIVE", 0)
@@ -39,3 +55,93 @@ class MedicalSentimentAnalyzer:
                 "negative": round(negative, 3)
             }
         }
+
+    def analyze(self, text: str) -> dict:
+        return self.analyze_many([text])[0]
+
+    def analyze_many(self, texts, batch_size: int = SENTIMENT_BATCH_SIZE) -> list:
+        """
+        Score many texts (e.g. a whole chat history or offline logs) in
+        batched forward passes. Returns one analyze() result per text.
+        """
+        if not texts:
+            return []
+
+        with self._pipeline_lock:
+            outputs = self.sentiment_pipeline(list(texts), batch_size=batch_size, truncation=True)
+        return [self._decide(scores) for scores in outputs]
+
+class CascadedSentimentAnalyzer:
+    """
+    Lexicon first stage, transformer only for inputs it is not confident
+    about. A sample of fast-path decisions is re-scored by the transformer
+    off the request path to track agreement.
+    """
+
+    def __init__(self, fast_stage=None, audit_rate: float = SENTIMENT_AUDIT_RATE):
+        self.fast_stage = fast_stage or LexiconSentiment()
+        self.audit_rate = audit_rate
+
+        self._audit_executor = ThreadPoolExecutor(max_workers=1)
+        self._lock = threading.Lock()
+        self.stats = {"total": 0, "fast": 0, "audited": 0, "agreed": 0}
+
+    @property
+    def transformer(self):
+        return get_transformer_analyzer()
+
+    def analyze(self, text: str) -> dict:
+        return self.analyze_many([text])[0]
+
+    def analyze_many(self, texts, batch_size: int = SENTIMENT_BATCH_SIZE) -> list:
+        texts = list(texts)
+        results = [self.fast_stage.predict(t) for t in texts]
+        deferred = [i for i, r in enumerate(results) if r is None]
+
+        if deferred:
+            for i, r in zip(deferred, self.transformer.analyze_many([texts[i] for i in deferred], batch_size)):
+                results[i] = dict(r, stage="transformer")
+
+        audit = []
+        for i, r in enumerate(results):
+            if "stage" not in r:
+                r["stage"] = "fast"
+                if random.random() < self.audit_rate:
+                    audit.append((texts[i], r["label"]))
+
+        with self._lock:
+            self.stats["total"] += len(texts)
+            self.stats["fast"] += len(texts) - len(deferred)
+
+        if audit:
+            self._audit_executor.submit(self._audit, audit)
+
+        return results
+
+    def _audit(self, items):
+        reference = self.transformer.analyze_many([t for t, _ in items])
+        with self._lock:
+            self.stats["audited"] += len(items)
+            self.stats["agreed"] += sum(r["label"] == label for (_, label), r in zip(items, reference))
+
+    def fast_path_fraction(self) -> float:
+        if not self.stats["total"]:
+            return 0.0
+        return self.stats["fast"] / self.stats["total"]
+
+    def agreement(self):
+        """Share of audited fast-path labels the transformer agrees with (None before any audit)"""
+        if not self.stats["audited"]:
+            return None
+        return self.stats["agreed"] / self.stats["audited"]
+
+@lru_cache(maxsize=1)
+def get_transformer_analyzer():
+    return MedicalSentimentAnalyzer()
+
+@lru_cache(maxsize=1)
+def get_sentiment_analyzer():
+    """Process-wide analyzer; the model is loaded once, not on every Streamlit rerun"""
+    if SENTIMENT_CASCADE:
+        return CascadedSentimentAnalyzer()
+    return get_transformer_analyzer()
@@ -0,0 +1,122 @@
+import re
+
+from anxiety_lexicon import get_anxiety_matcher
+
+# Word / phrase -> polarity weight (negative < 0 < positive)
+SENTIMENT_LEXICON = {
+    # negative
+    "worried": -2, "worry": -2, "scared": -2, "afraid": -2, "anxious": -2, "anxiety": -1.5,
+    "panic": -2, "panicking": -2, "terrified": -3, "frightened": -2, "nervous": -1.5,
+    "fear": -2, "depressed": -2, "hopeless": -3, "desperate": -2.5, "upset": -2,
+    "angry": -2, "frustrated": -2, "annoyed": -1.5, "sad": -2, "miserable": -2.5,
+    "awful": -2, "terrible": -2, "horrible": -2.5, "worst": -2.5, "bad": -1,
+    "worse": -1.5, "unbearable": -3, "suffering": -2, "struggling": -1.5, "hurts": -1,
+    "cry": -1.5, "crying": -1.5, "alone": -1, "helpless": -2.5, "confused": -1,
+    "dying": -2.5, "die": -2, "useless": -2, "hate": -2.5, "nightmare": -2.5,
+    "can't cope": -3, "can't sleep": -1.5, "freaking out": -3, "falling apart": -3,
+    "not working": -1.5, "no one": -1,
+    # positive
+    "thanks": 2, "thank": 2, "grateful": 2.5, "great": 2, "good": 1, "better": 1,
+    "glad": 2, "happy": 2, "relieved": 2, "helpful": 2, "appreciate": 2, "awesome": 2.5,
+    "excellent": 2.5, "wonderful": 2.5, "love": 2, "perfect": 2, "improving": 1.5,
+    "hopeful": 2, "excited": 2, "recovered": 1.5,
+}
+
+NEGATORS = frozenset("not no never without hardly don't doesn't didn't isn't aren't wasn't can't won't".split())
+NEGATION_WINDOW = 3
+
+# Openers of plain informational questions ("What are the symptoms of ...")
+QUESTION_OPENERS = frozenset("""what how which who whom when where why can could is are does do
+should would will may list describe explain tell define""".split())
+
+_WORD_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+_PHRASES = {p: w for p, w in SENTIMENT_LEXICON.items() if " " in p}
+_WORDS = {p: w for p, w in SENTIMENT_LEXICON.items() if " " not in p}
+
+def lexicon_score(text: str):
+    """
+    Polarity of the text from the lexicon. A negator up to NEGATION_WINDOW
+    words before a term flips it. Returns score, term counts by polarity,
+    the number of negated terms and the tokens.
+    """
+    tokens = _WORD_RE.findall(text.lower().replace("’", "'"))
+    result = {"score": 0.0, "positive": 0, "negative": 0, "negated": 0, "tokens": tokens}
+
+    i = 0
+    while i < len(tokens):
+        weight, width = None, 1
+        if i + 1 < len(tokens):
+            weight = _PHRASES.get(f"{tokens[i]} {tokens[i + 1]}")
+            width = 2 if weight is not None else 1
+        if weight is None:
+            weight = _WORDS.get(tokens[i])
+
+        if weight is not None:
+            if any(t in NEGATORS for t in tokens[max(0, i - NEGATION_WINDOW):i]):
+                weight = -weight
+                result["negated"] += 1
+            result["score"] += weight
+            result["positive" if weight > 0 else "negative"] += 1
+
+        i += width
+
+    return result
+
+
+class LexiconSentiment:
+    """
+    Microsecond-scale first stage. Returns an analyze()-shaped result when
+    confident, otherwise None (the input goes to the transformer).
+
+    - No sentiment terms + looks like a plain question -> NEUTRAL
+    - |score| >= min_score with terms of one polarity only and no
+      negation -> NEGATIVE / POSITIVE
+
+    Messages with anxiety / medical-distress terms ("chest pain",
+    "cancer") are never decided NEUTRAL or POSITIVE here: anxiety handling
+    depends on the NEGATIVE label, so the transformer has to see them.
+    """
+
+    def __init__(self, min_score: float = 2.0, neutral_confidence: float = 0.85, max_question_tokens: int = 30,
+                 distress_matcher=None):
+        self.min_score = min_score
+        self.neutral_confidence = neutral_confidence
+        self.max_question_tokens = max_question_tokens
+        self.distress_matcher = distress_matcher or get_anxiety_matcher("en")
+
+    def predict(self, text: str):
+        lex = lexicon_score(text)
+        tokens, score = lex["tokens"], lex["score"]
+
+        if not tokens:
+            return None
+
+        if not lex["positive"] and not lex["negative"]:
+            if self.distress_matcher.matches(text):
+                return None
+            is_question = text.strip().endswith("?") or tokens[0] in QUESTION_OPENERS
+            if is_question and len(tokens) <= self.max_question_tokens:
+                return self._result("NEUTRAL", self.neutral_confidence)
+            return None
+
+        if abs(score) < self.min_score:
+            return None
+
+        # Mixed polarity ("thanks, but I'm still scared") and negated terms
+        # ("not worried, just curious") are left to the transformer
+        if (lex["positive"] and lex["negative"]) or lex["negated"]:
+            return None
+
+        if score > 0 and self.distress_matcher.matches(text):
+            return None
+
+        confidence = min(0.95, 0.5 + 0.15 * abs(score))
+        return self._result("POSITIVE" if score > 0 else "NEGATIVE", confidence)
+
+    @staticmethod
+    def _result(label: str, confidence: float):
+        rest = round((1 - confidence) / 2, 3)
+        scores = {"positive": rest, "neutral": rest, "negative": rest}
+        scores[label.lower()] = round(confidence, 3)
+        return {"label": label, "scores": scores}
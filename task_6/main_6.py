@@ -1,7 +1,8 @@
+import time
 import streamlit as st
 from helper import create_vector_store, retrieve_context
 from language_utils import detect_language
-from translator import translate
+from translator import translate, translate_stream
 
 
 st.set_page_config(page_title="Multilingual Medical Q&A Chatbot")
@@ -19,6 +20,9 @@ if btn:
 question = st.text_input("Ask a question:")
 
 if st.button("Ask") and question:
+    st.subheader("📌 Answer")
+    answer_placeholder = st.empty()
+
     with st.spinner("Understanding your question..."):
 
         # 1. Detect language
@@ -31,18 +35,20 @@ if st.button("Ask") and question:
             target="en"
         )
 
-        # 3. Get answer from RAG
+        # 3. Get answer from RAG, token by token
         rag = retrieve_context()
-        english_response = rag.invoke(translated_question)
 
-        # 5. Translate response back
-        final_response = translate(
-            english_response,
-            source="en",
-            target=user_lang
-        )
+        # 4. Translate response back, sentence by sentence as it streams
+        final_response = ""
+        first_token_s = None
+        start = time.perf_counter()
+        for chunk in translate_stream(rag.stream(translated_question), source="en", target=user_lang):
+            if first_token_s is None:
+                first_token_s = time.perf_counter() - start
+            final_response += chunk
+            answer_placeholder.write(final_response)
 
-    st.subheader("📌 Answer")
-    st.write(final_response)
+    print(f"Time to first token: {first_token_s or 0:.2f}s")
 
     st.caption(f"Language detected: {user_lang.upper()}")
+    st.metric("Time to first token", f"{first_token_s or 0:.2f}s")
@@ -1,6 +1,34 @@
+import re
 from deep_translator import GoogleTranslator
 
 def translate(text, source, target):
     if source == target:
         return text
     return GoogleTranslator(source=source, target=target).translate(text)
+
+# Sentence ends and line breaks, kept as separate pieces by re.split
+_SEGMENT_RE = re.compile(r"((?<=[.!?])\s+|\n+)")
+
+def translate_stream(chunks, source, target):
+    """
+    Translate a stream of text chunks one finished sentence at a time,
+    so translated text starts appearing before generation is complete.
+    """
+    if source == target:
+        yield from chunks
+        return
+
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        pieces = _SEGMENT_RE.split(buffer)
+        buffer = pieces.pop()
+
+        # pieces alternate text, separator, text, separator, ...
+        for i in range(0, len(pieces), 2):
+            if pieces[i].strip():
+                yield translate(pieces[i], source, target)
+            yield pieces[i + 1]
+
+    if buffer.strip():
+        yield translate(buffer, source, target)